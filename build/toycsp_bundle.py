@@ -1,5 +1,5 @@
 #####################################################
-# Single file bundle of toycsp generated on 2026-03-21 08:10:10.063272
+# Single file bundle of toycsp generated on 2026-10-15 20:11:33.674857
 # Do not modify file
 # Regenerate with 
 #   python bundler.py > csp_bundle.py
@@ -9,7 +9,8 @@
 from collections.abc import Iterable
 from abc import ABC, abstractmethod
 from typing import override
-from typing import Optional, Any, Callable, cast
+from collections import deque
+from typing import Any, Callable
 
 type PartialSolution = list[int | None]
 type Solution = list[int]
@@ -20,15 +21,26 @@ class Inconsistency(Exception):
     pass
 
 
+# Outcome of a domain change or of a propagation. Returned instead of raising
+# Inconsistency, since a dead end is met at most nodes of the search.
+PROP_UNCHANGED = 0  # nothing was removed
+PROP_CHANGED = 1    # at least one value was removed
+PROP_FAIL = 2       # a domain would become empty
+
+
 
 
 
 class Domain:
     """
     Implementation of a very basic domain
-    using a set to store the values
+    using the bits of an integer (bitmask) to store the values:
+    value v belongs to the domain iff bit v - offset of `mask` is set,
+    where `offset` is the smallest initial value.
     """
 
+    __slots__ = ('trail', 'dirty', 'idx', 'mask', 'offset')
+
     def __init__(self, *args) -> None:
         """
         Initializes a domain with {0, ... ,n-1}
@@ -36,17 +48,72 @@ class Domain:
         Args:
             n: The number of values in the domain.
         """
+        # undo log shared with the CSP: each change pushes (domain, old mask)
+        self.trail: list[tuple[Domain, int]] | None = None
+        # list shared with the CSP where each change pushes `idx`, the index
+        # of the variable owning the domain (set together with `trail`)
+        self.dirty: list[int] | None = None
+        self.idx: int = -1
+
         if len(args) != 1:
             raise TypeError("Domain takes only one parameter")
         elif isinstance(args[0], int):
             n = args[0]
-            self.values = set(range(n))
+            self.mask: int = (1 << n) - 1 if n > 0 else 0
+            self.offset: int = 0
         elif isinstance(args[0], set):
-            dom = args[0]
-            self.values = dom.copy()
+            # bit i of the mask stands for the value offset + i
+            self.offset = min(args[0]) if args[0] else 0
+            self.mask = Domain.mask_of(args[0], self.offset)
         else:
             raise TypeError("Argument must be int or set[int]")
 
+    @classmethod
+    def from_range(cls, start: int, stop: int) -> "Domain":
+        """
+        Creates the domain {start, ..., stop-1} with a single shift, without
+        iterating over the values
+
+        Args:
+            start: The smallest value.
+            stop: The value following the largest one.
+
+        Returns:
+            A new Domain object.
+        """
+        dom = cls(0)
+        if stop > start:
+            dom.mask = (1 << (stop - start)) - 1
+            dom.offset = start
+        return dom
+
+    @staticmethod
+    def mask_of(values: Iterable[int], offset: int = 0) -> int:
+        """
+        Builds the bitmask representing the given values
+
+        Args:
+            values: The values to encode (none smaller than `offset`).
+            offset: The value represented by bit 0.
+
+        Returns:
+            An integer with bit v - offset set for each value v.
+        """
+        mask = 0
+        for v in values:
+            if v < offset:
+                raise ValueError("Domain values must not be smaller than the offset")
+            mask |= 1 << (v - offset)
+        return mask
+
+    @property
+    def values(self) -> set[int]:
+        """
+        The values of the domain as a set (built on demand, not for hot paths)
+        """
+        mask, offset = self.mask, self.offset
+        return {v + offset for v in range(mask.bit_length()) if (mask >> v) & 1}
+
     def is_fixed(self) -> bool:
         """
         Verifies if only one value left
@@ -54,7 +121,8 @@ class Domain:
         Returns:
             True if only one value left, False otherwise.
         """
-        return len(self.values) == 1
+        mask = self.mask
+        return mask != 0 and mask & (mask - 1) == 0
 
     def size(self) -> int:
         """
@@ -63,22 +131,26 @@ class Domain:
         Returns:
             The number of values in the domain.
         """
-        return len(self.values)
+        return self.mask.bit_count()
     
     def __len__(self) -> int:
         """
         Same as .size()
         """
-        return self.size()
+        return self.mask.bit_count()
 
     def min(self) -> int:
         """
-        Gets the minimum of the domain
+        Gets the minimum of the domain (position of the lowest set bit,
+        isolated by `mask & -mask`)
 
         Returns:
             The minimum value in the domain.
         """
-        return min(self.values)
+        mask = self.mask
+        if not mask:
+            raise ValueError("min() of an empty domain")
+        return (mask & -mask).bit_length() - 1 + self.offset
     
     def max(self) -> int:
         """
@@ -87,9 +159,11 @@ class Domain:
         Returns:
             The maximum value in the domain.
         """
-        return max(self.values)
+        if not self.mask:
+            raise ValueError("max() of an empty domain")
+        return self.mask.bit_length() - 1 + self.offset
 
-    def remove(self, v: int) -> bool:
+    def remove(self, v: int) -> int:
         """
         Removes value v from the domain
 
@@ -97,28 +171,86 @@ class Domain:
             v: The value to remove.
 
         Returns:
-            True if the value was present in the domain, False otherwise.
+            PROP_CHANGED if the value was removed, PROP_UNCHANGED if it was not
+            in the domain and PROP_FAIL (domain left untouched) if it was the
+            last value.
+        """
+        mask = self.mask
+        i = v - self.offset
+        if i < 0 or not (mask >> i) & 1:
+            return PROP_UNCHANGED
+        if mask == 1 << i:
+            return PROP_FAIL
+        if self.trail is not None:
+            self.trail.append((self, mask))
+            self.dirty.append(self.idx)
+        self.mask = mask ^ 1 << i
+        return PROP_CHANGED
+
+    def remove_mask(self, bits: int) -> int:
+        """
+        Removes at once all the values whose bit is set in `bits`
+
+        Args:
+            bits: The bitmask of the values to remove, with the offset of
+                the domain (bit i stands for the value offset + i).
+
+        Returns:
+            PROP_CHANGED if at least one value was removed, PROP_UNCHANGED if
+            none was in the domain and PROP_FAIL (domain left untouched) if
+            no value would be left.
+        """
+        old = self.mask
+        mask = old & ~bits
+        if mask == old:
+            return PROP_UNCHANGED
+        if not mask:
+            return PROP_FAIL
+        if self.trail is not None:
+            self.trail.append((self, old))
+            self.dirty.append(self.idx)
+        self.mask = mask
+        return PROP_CHANGED
+
+    def remove_above(self, v: int) -> int:
+        """
+        Removes all the values greater than v from the domain
+
+        Args:
+            v: The largest value to keep.
+
+        Returns:
+            PROP_CHANGED if at least one value was removed, PROP_UNCHANGED if
+            none was greater than v and PROP_FAIL (domain left untouched) if
+            no value would be left.
         """
-        if v in self.values:
-            self.values.remove(v)
-            if not self.values:
-                raise Inconsistency
-            return True
-        return False
+        i = v - self.offset
+        if i < 0:
+            return PROP_FAIL if self.mask else PROP_UNCHANGED
+        return self.remove_mask(~((1 << (i + 1)) - 1))
 
-    def fix(self, v: int):
+    def fix(self, v: int) -> int:
         """
         Fixes the domain to value v
 
         Args:
             v: The value to fix the domain to.
 
-        Raises:
-            Inconsistency: If the value is not in the domain.
-        """
-        if v not in self.values:
-            raise Inconsistency
-        self.values = {v}
+        Returns:
+            PROP_CHANGED if the domain changed, PROP_UNCHANGED if it was
+            already {v} and PROP_FAIL if the value is not in the domain.
+        """
+        i = v - self.offset
+        if i < 0 or not (self.mask >> i) & 1:
+            return PROP_FAIL
+        bit = 1 << i
+        if self.mask == bit:
+            return PROP_UNCHANGED
+        if self.trail is not None:
+            self.trail.append((self, self.mask))
+            self.dirty.append(self.idx)
+        self.mask = bit
+        return PROP_CHANGED
 
     def clone(self) -> "Domain":
         """
@@ -127,7 +259,10 @@ class Domain:
         Returns:
             A new Domain object with the same values.
         """
-        return Domain(self.values)
+        clone = Domain(0)
+        clone.mask = self.mask
+        clone.offset = self.offset
+        return clone
 
     def __repr__(self) -> str:
         return f"Domain({self.values})"
@@ -140,16 +275,35 @@ class Domain:
 
 class Variable:
 
-    var_counter = 0
-    
+    __slots__ = ('dom', 'idx', '_name')
+
     def __init__(self, dom: Iterable[int], name: str | None = None) -> None:
-        self.dom = Domain(set(dom))
-        self.name = name or 'Var' + str(Variable.var_counter)
-        Variable.var_counter += 1
+        if isinstance(dom, range) and dom.step == 1:
+            self.dom = Domain.from_range(dom.start, dom.stop)
+        else:
+            self.dom = Domain(set(dom))
+        # index in `ToyCSP.variables`, set by `ToyCSP.add_variable`
+        self.idx: int = -1
+        self._name = name
         
+    @property
+    def name(self) -> str:
+        # the default name is only built when someone asks for it
+        if self._name:
+            return self._name
+        # not added to a CSP yet: no index to number it with
+        return f'Var{self.idx}' if self.idx >= 0 else 'Var?'
+
+    @name.setter
+    def name(self, name: str | None) -> None:
+        self._name = name
+
     def value(self) -> int | None:
-        if self.dom.is_fixed():
-            return self.dom.min()
+        # a fixed domain has a single bit set: its value is the bit position
+        # plus the offset of the domain
+        mask = self.dom.mask
+        if mask and not mask & (mask - 1):
+            return mask.bit_length() - 1 + self.dom.offset
         else:
             return None
         
@@ -162,18 +316,58 @@ class Variable:
 
 
 
+
 class Constraint(ABC):
     """
     Abstract base class for constraints.
+
+    Each constraint exposes the variables it is defined on in `vars`: the
+    solver only propagates it again when the domain of one of them changes.
+
+    A constraint is propagated again after its own changes too, unless it is
+    `idempotent`: set it to True only if one call to `propagate` always
+    reaches the fix point of the constraint.
+
+    >>> from toycsp.csp import ToyCSP
+    >>> class LessThan(Constraint):  # x < y, at most one removal per call
+    ...     def __init__(self, x, y):
+    ...         self.x, self.y = x, y
+    ...         self.vars = (x, y)
+    ...     def propagate(self):
+    ...         dx, dy = self.x.dom, self.y.dom
+    ...         if dx.max() >= dy.max():
+    ...             return dx.remove(dx.max())
+    ...         if dy.min() <= dx.min():
+    ...             return dy.remove(dy.min())
+    ...         return PROP_UNCHANGED
+    >>> solutions = []
+    >>> csp = ToyCSP(on_solution=lambda csp, infos: solutions.append(csp.get_solution()))
+    >>> x, y = csp.add_variable(range(3)), csp.add_variable(range(3))
+    >>> c = csp.post(LessThan(x, y))
+    >>> x.dom.values, y.dom.values
+    ({0, 1}, {1, 2})
+    >>> csp.dfs()
+    >>> sorted(solutions)
+    [[0, 1], [0, 2], [1, 2]]
     """
 
+    # no instance __dict__ here, so that subclasses declaring __slots__ get none
+    __slots__ = ()
+
+    vars: tuple[Variable, ...] = ()
+    # True while the constraint waits in the propagation queue of the CSP
+    queued: bool = False
+    # True if `propagate` reaches the fix point of the constraint in one call
+    idempotent: bool = False
+
     @abstractmethod
-    def propagate(self) -> bool:
+    def propagate(self) -> int:
         """
-        Propagate the constraint and return True if any value could be removed.
+        Propagate the constraint.
 
         Returns:
-            True if at least one value of one variable could be removed, False otherwise.
+            PROP_CHANGED if at least one value of one variable could be removed,
+            PROP_FAIL if a domain would become empty and PROP_UNCHANGED otherwise.
         """
         pass
 
@@ -185,6 +379,11 @@ class NotEqual(Constraint):
     Constraint representing x != y + offset.
     """
 
+    __slots__ = ('x', 'y', 'offset', 'vars', 'queued', 'dx', 'dy', 'x_shift', 'y_shift')
+
+    # a single call removes all the values it can
+    idempotent = True
+
     def __init__(self, x: Variable, y: Variable, offset: int = 0) -> None:
         """
         Initializes the NotEqual constraint (x != y + offset).
@@ -197,20 +396,37 @@ class NotEqual(Constraint):
         self.x = x
         self.y = y
         self.offset = offset
+        self.vars = (x, y)
+        self.queued = False
+        # domains are restored in place on backtrack, so they can be bound
+        # once here instead of being looked up on every propagation
+        self.dx = x.dom
+        self.dy = y.dom
+        # the value v of a fixed domain is mask.bit_length() - 1 plus the
+        # offset of the domain: removing v - offset from y (resp. v + offset
+        # from x) only takes one subtraction
+        self.x_shift = 1 + offset - self.dx.offset
+        self.y_shift = 1 - offset - self.dy.offset
 
     @override
-    def propagate(self) -> bool:
+    def propagate(self) -> int:
         """
         Propagates the NotEqual constraint.
 
         Returns:
-            True if any value was removed from a domain, False otherwise.
-        """
-        if self.x.dom.is_fixed():
-            return self.y.dom.remove(self.x.dom.min() - self.offset)
-        elif self.y.dom.is_fixed():
-            return self.x.dom.remove(self.y.dom.min() + self.offset)
-        return False
+            PROP_CHANGED if any value was removed from a domain, PROP_FAIL if
+            a domain would become empty, PROP_UNCHANGED otherwise.
+        """
+        # a domain is fixed when its bitmask has exactly one bit set, whose
+        # position is the value
+        dx, dy = self.dx, self.dy
+        mx = dx.mask
+        if mx and not mx & (mx - 1):
+            return dy.remove(mx.bit_length() - self.x_shift)
+        my = dy.mask
+        if my and not my & (my - 1):
+            return dx.remove(my.bit_length() - self.y_shift)
+        return PROP_UNCHANGED
 
     def __repr__(self) -> str:
         return f'NotEqual(x={self.x}, y={self.y}, offset={self.offset})'
@@ -221,6 +437,155 @@ class NotEqual(Constraint):
 
 
 
+class QueensPair(Constraint):
+    """
+    Constraint between the rows x and y of two queens placed d columns apart:
+    they are neither on the same row nor on the same diagonal, that is
+    x != y, x != y + d and x != y - d.
+
+    Same filtering as the three NotEqual(x, y, 0), NotEqual(x, y, d) and
+    NotEqual(x, y, -d), in a single constraint.
+    """
+
+    __slots__ = ('x', 'y', 'd', 'vars', 'queued', 'dx', 'dy', 'x_to_y', 'y_to_x')
+
+    # a single call removes all the values it can
+    idempotent = True
+
+    def __init__(self, x: Variable, y: Variable, d: int) -> None:
+        """
+        Initializes the QueensPair constraint.
+
+        Args:
+            x: The row of the first queen.
+            y: The row of the second queen.
+            d: The distance between the columns of the two queens.
+        """
+        self.x = x
+        self.y = y
+        self.d = d
+        self.vars = (x, y)
+        self.queued = False
+        self.dx = x.dom
+        self.dy = y.dom
+        # the attacked rows are built d bits higher so that none is lost,
+        # then moved into the bits of the other domain (the offsets of the
+        # domains may differ)
+        self.x_to_y = self.dx.offset - self.dy.offset - d
+        self.y_to_x = self.dy.offset - self.dx.offset - d
+
+    @override
+    def propagate(self) -> int:
+        """
+        Propagates the QueensPair constraint: once a queen is fixed, removes
+        its row and its two diagonals from the domain of the other one.
+
+        Returns:
+            PROP_CHANGED if any value was removed from a domain, PROP_FAIL if
+            a domain would become empty, PROP_UNCHANGED otherwise.
+        """
+        d = self.d
+        mx = self.dx.mask
+        if mx and not mx & (mx - 1):
+            # shifting the single bit of the fixed queen gives the attacked rows
+            m = mx << d
+            m |= m << d | m >> d
+            k = self.x_to_y
+            return self.dy.remove_mask(m << k if k >= 0 else m >> -k)
+        my = self.dy.mask
+        if my and not my & (my - 1):
+            m = my << d
+            m |= m << d | m >> d
+            k = self.y_to_x
+            return self.dx.remove_mask(m << k if k >= 0 else m >> -k)
+        return PROP_UNCHANGED
+
+    def __repr__(self) -> str:
+        return f'QueensPair(x={self.x}, y={self.y}, d={self.d})'
+
+    def __str__(self) -> str:
+        return f'{self.x.name} !~ {self.y.name} ({self.d} apart)'
+
+
+
+
+class AllDifferent(Constraint):
+    """
+    Constraint stating that the variables all take different values.
+
+    Same filtering as a NotEqual between each pair of variables (the values
+    of the fixed variables are removed from the others), in a single
+    constraint working on the bitmasks of the domains.
+    """
+
+    __slots__ = ('vars', 'queued', 'doms', 'shifts')
+
+    # a single call removes all the values it can
+    idempotent = True
+
+    def __init__(self, vars: Iterable[Variable]) -> None:
+        """
+        Initializes the AllDifferent constraint.
+
+        Args:
+            vars: The variables that must take different values.
+        """
+        self.vars = tuple(vars)
+        self.queued = False
+        self.doms = tuple(var.dom for var in self.vars)
+        # the masks are compared with the smallest offset: the mask of each
+        # domain is shifted up by the difference of its offset with it
+        base = min((dom.offset for dom in self.doms), default=0)
+        self.shifts = tuple(dom.offset - base for dom in self.doms)
+
+    @override
+    def propagate(self) -> int:
+        """
+        Propagates the AllDifferent constraint: removes the values of the fixed
+        variables from the domains of the other ones, until no new variable
+        gets fixed.
+
+        Returns:
+            PROP_CHANGED if any value was removed from a domain, PROP_FAIL if
+            two variables are fixed to the same value or a domain would become
+            empty, PROP_UNCHANGED otherwise.
+        """
+        status = PROP_UNCHANGED
+        n_fixed = -1
+        while True:
+            # union of the values of the fixed variables
+            fixed = 0
+            count = 0
+            for dom, shift in zip(self.doms, self.shifts):
+                mask = dom.mask
+                if not mask & (mask - 1):
+                    mask <<= shift
+                    if fixed & mask:
+                        return PROP_FAIL
+                    fixed |= mask
+                    count += 1
+            if count == n_fixed:
+                return status
+            n_fixed = count
+
+            for dom, shift in zip(self.doms, self.shifts):
+                mask = dom.mask
+                if mask & (mask - 1):
+                    removed = dom.remove_mask(fixed >> shift)
+                    if removed == PROP_FAIL:
+                        return PROP_FAIL
+                    if removed == PROP_CHANGED:
+                        status = PROP_CHANGED
+
+    def __repr__(self) -> str:
+        return f'AllDifferent(vars={list(self.vars)})'
+
+    def __str__(self) -> str:
+        return f'alldifferent({", ".join(var.name for var in self.vars)})'
+
+
+
+
 
 class ToyCSP:
     """
@@ -231,12 +596,25 @@ class ToyCSP:
 
         self.constraints: list[Constraint] = []
         self.variables: list[Variable] = []
-        self.n_recur: int = 0  # Number of recursive calls
+        # constraints to propagate again when the domain of a variable
+        # changes, indexed by `Variable.idx`
+        self.var_to_constraints: list[list[Constraint]] = []
+        # propagation queue (AC-3), see also `Constraint.queued`
+        self.queue: deque[Constraint] = deque()
+        # undo log of the domain changes: (domain, mask before the change)
+        self.trail: list[tuple[Domain, int]] = []
+        # indices of the variables whose domain changed since their
+        # constraints were last scheduled
+        self.dirty: list[int] = []
+        self.n_recur: int = 0  # Number of search nodes visited by dfs
+        # False when constraints were posted since the last sort_constraints
+        self._sorted: bool = True
 
         # collects all handlers (args beginning with `on_`)
         self.handlers = {
             arg.split('on_')[1]: [value] for arg, value in kwargs.items() if arg.startswith("on_")
         }
+        self._bind_emitters()
 
     def __repr__(self) -> str:
         # return f"ToyCSP(constraints={self.constraints}, variables={self.variables})"
@@ -254,44 +632,94 @@ class ToyCSP:
             A new Variable object.
         """
         var = Variable(domain, name)
+        var.idx = var.dom.idx = len(self.variables)
+        var.dom.trail = self.trail
+        var.dom.dirty = self.dirty
         self.variables.append(var)
+        self.var_to_constraints.append([])
         return var
 
     def post(self, constraint: Constraint, schedule_fixpoint=True) -> Constraint:
         """
         Posts (adds) a constraint to the CSP and optionally schedules a fix point.
 
+        The constraint is put in the propagation queue: when no fix point is
+        computed right away, it is propagated by the next call to `fix_point`.
+
         Args:
             constraint: The constraint to add.
             schedule_fixpoint: If True, schedules a fix point after adding the constraint.
 
         Returns:
             The added constraint.
-        """
+
+        Raises:
+            ValueError: If the constraint has no variables (`vars` is empty),
+                or is defined on a variable that was not created by
+                `add_variable` on this CSP.
+            Inconsistency: If the fix point fails, i.e. the problem has no
+                solution.
+        """
+        if not constraint.vars:
+            # it would never be scheduled again after its first propagation
+            raise ValueError(f"{constraint!r} does not declare its variables in `vars`")
+        variables = self.variables
+        for var in constraint.vars:
+            if not 0 <= var.idx < len(variables) or variables[var.idx] is not var:
+                raise ValueError(f"{var} is not a variable of this CSP")
         self.constraints.append(constraint)
-        if schedule_fixpoint:
-            self.fix_point()
+        self._sorted = False
+        for var in constraint.vars:
+            self.var_to_constraints[var.idx].append(constraint)
+        self.schedule(constraint)
+        if schedule_fixpoint and not self.fix_point(()):
+            raise Inconsistency
         return constraint
 
-    def backup_domains(self) -> list[Domain]:
+    def schedule(self, constraint: Constraint) -> None:
+        """
+        Adds the constraint to the propagation queue unless it is already in it.
+
+        Args:
+            constraint: The constraint to propagate.
+        """
+        if not constraint.queued:
+            constraint.queued = True
+            self.queue.append(constraint)
+
+    def backup_domains(self) -> list[int]:
         """
         Creates a backup copy of all variable domains.
 
         Returns:
-            A list of Domain objects representing the backed-up domains.
+            A list of bitmasks representing the backed-up domains.
         """
-        backup = [var.dom.clone() for var in self.variables]
+        backup = [var.dom.mask for var in self.variables]
         return backup
 
-    def restore_domains(self, backup: list[Domain]) -> None:
+    def restore_domains(self, backup: list[int]) -> None:
         """
         Restores the domains of all variables from the backup.
 
         Args:
-            backup: A list of Domain objects representing the backed-up domains.
+            backup: A list of bitmasks representing the backed-up domains.
+        """
+        for var, mask in zip(self.variables, backup):
+            var.dom.mask = mask
+
+    def restore_trail(self, mark: int) -> None:
+        """
+        Undoes the domain changes recorded in the trail after position `mark`.
+
+        Args:
+            mark: Length of the trail (`len(self.trail)`) at the state to restore.
         """
-        for i, var in enumerate(self.variables):
-            var.dom = backup[i]
+        trail = self.trail
+        while len(trail) > mark:
+            dom, mask = trail.pop()
+            dom.mask = mask
+        # the undone changes no longer have to be propagated
+        self.dirty.clear()
 
     def get_partial_solution(self) -> PartialSolution:
         """
@@ -300,7 +728,7 @@ class ToyCSP:
         Returns:
             A list of integers or None representing the current partial solution.
         """
-        return [cast(Optional[int], var.value()) for var in self.variables]
+        return [var.value() for var in self.variables]
 
     def get_solution(self) -> Solution:
         """
@@ -311,10 +739,17 @@ class ToyCSP:
         Returns:
             A list of integers representing the solution.
         """
-        if not all(var.dom.is_fixed() for var in self.variables):
-            raise ValueError(
-                "Not all variables are fixed. No solution available.")
-        return [cast(int, v.value()) for v in self.variables]
+        # one pass over the bitmasks: a fixed domain has a single bit set,
+        # whose position plus the offset of the domain is the value
+        solution = []
+        for var in self.variables:
+            dom = var.dom
+            mask = dom.mask
+            if not mask or mask & (mask - 1):
+                raise ValueError(
+                    "Not all variables are fixed. No solution available.")
+            solution.append(mask.bit_length() - 1 + dom.offset)
+        return solution
 
     def first_not_fixed(self) -> Variable | None:
         """
@@ -336,82 +771,173 @@ class ToyCSP:
         min_size = float("inf")
         smallest_var = None
         for var in self.variables:
-            if not var.dom.is_fixed() and var.dom.size() < min_size:
-                min_size = var.dom.size()
+            # popcount of the bitmask, without the method calls of Domain
+            size = var.dom.mask.bit_count()
+            if 1 < size < min_size:
+                min_size = size
                 smallest_var = var
-        # return smallest_var if smallest_var else None
+                if size == 2:
+                    # no unfixed domain can be smaller
+                    break
         return smallest_var
 
-    def fix_point(self) -> bool:
+    def fix_point(self, changed: Iterable[Variable] | None = None) -> bool:
         """
         Performs constraint propagation until no further changes occur.
 
-        Returns:
-            True if a fix point is reached (no more changes), False otherwise.
-        """
-        self.call_handlers("beforefixpoint", {"event": "before fixpoint"})
+        Only the constraints of the propagation queue are propagated: the
+        domains record the index of their variable in `dirty` when they
+        change, and only the constraints on these variables are scheduled
+        again (AC-3).
 
-        fix = False
-        while not fix:
-            fix = True
-            for constraint in self.constraints:
-                was_usefull = constraint.propagate()
-                # if only one propagation is usefull amongst all constraints,
-                # fix will become false and the while
-                # loop will continue
-                fix &= not was_usefull
-                self.call_handlers("propagate", {
-                    "event": f"propagating",
-                    "usefull": was_usefull,
-                    "constraint": constraint,
-                })
+        Args:
+            changed: Variables whose constraints are scheduled first, on top
+                of those whose domain changed since the last fix point. If
+                None, all the constraints are scheduled.
+
+        Constraints report a failure by returning PROP_FAIL; raising
+        Inconsistency is also supported.
 
-        self.call_handlers("afterfixpoint", {"event": "after fixpoint"})
+        Returns:
+            True if a fix point is reached (no more changes), False if a
+            domain would become empty.
+        """
+        if self._h_beforefixpoint:
+            self.call_handlers("beforefixpoint", {"event": "before fixpoint"})
 
-        return fix
+        var_to_constraints = self.var_to_constraints
+        dirty = self.dirty
 
-    def dfs(self, on_solution=None, on_fixpoint=None) -> None:
+        if changed is None:
+            for constraint in self.constraints:
+                self.schedule(constraint)
+        else:
+            for var in changed:
+                for constraint in var_to_constraints[var.idx]:
+                    self.schedule(constraint)
+        # domains changed outside of the fix point (e.g. by the search)
+        while dirty:
+            for constraint in var_to_constraints[dirty.pop()]:
+                self.schedule(constraint)
+
+        queue = self.queue
+        emit_propagate = self._emit_propagate
+        try:
+            while queue:
+                constraint = queue.popleft()
+                constraint.queued = False
+                status = constraint.propagate()
+                if status == PROP_FAIL:
+                    self._clear_queue()
+                    return False
+                # the constraints on the variables whose domain shrunk have
+                # to be propagated again, this one too unless it is idempotent
+                skip = constraint if constraint.idempotent else None
+                while dirty:
+                    for other in var_to_constraints[dirty.pop()]:
+                        if not other.queued and other is not skip:
+                            other.queued = True
+                            queue.append(other)
+                emit_propagate(constraint, status)
+        except Inconsistency:
+            self._clear_queue()
+            return False
+
+        if self._h_afterfixpoint:
+            self.call_handlers("afterfixpoint", {"event": "after fixpoint"})
+
+        return True
+
+    def sort_constraints(self) -> None:
+        """
+        Sorts the constraints, and the constraints of each variable, by the
+        indices of their variables: consecutive propagations then work on
+        neighbouring variables. The fix point does not depend on this order.
+        """
+        def key(constraint: Constraint) -> tuple[int, int]:
+            indices = [var.idx for var in constraint.vars]
+            return (min(indices, default=-1), sum(indices))
+
+        self.constraints.sort(key=key)
+        for constraints in self.var_to_constraints:
+            constraints.sort(key=key)
+        self._sorted = True
+
+    def _clear_queue(self) -> None:
+        """Empties the propagation queue and the dirty list after a failure."""
+        for constraint in self.queue:
+            constraint.queued = False
+        self.queue.clear()
+        self.dirty.clear()
+
+    def dfs(self, on_solution=None, on_fixpoint=None,
+            select_variable: Callable[[], Variable | None] | None = None) -> None:
         """
         Performs Depth-First Search (DFS) to find all solutions to the CSP.
 
+        The constraints that are still in the propagation queue (e.g. posted
+        with `schedule_fixpoint=False`) are propagated first, at the root.
+
+        The search is iterative: the right branches still to explore are kept
+        on an explicit stack as `(variable, value, trail mark)`.
+
         Args:
             on_solution: A callback function that receives a solution (variable assignments).
+            select_variable: Returns the next variable to branch on, or None
+                if all are fixed. Defaults to `smallest_not_fixed` (first-fail);
+                pass `self.first_not_fixed` to branch in the variable order.
         """
-        self.n_recur += 1
+        select_variable = select_variable or self.smallest_not_fixed
 
-        # Choisissez une variable non fixée (première rencontrée ou la plus petite)
-        not_fixed = (
-            self.first_not_fixed()
-        )  # Essayer d'abord first_not_fixed (implémentation originale)
+        if not self._sorted:
+            self.sort_constraints()
 
-        if not not_fixed:
-            # Toutes les variables sont fixées, une solution est trouvée
-            self.call_handlers("solution", {})
-        else:
-            variable = not_fixed
-            value = variable.dom.min()
-            backup = self.backup_domains()
-
-            # Branche gauche : affecter la valeur à la variable
-            try:
-                variable.dom.fix(value)
-                self.fix_point()
-                self.dfs()
-            except Inconsistency:
-                self.call_handlers(
-                    "inconsistent", {"event": "inconsistent", "current_var": variable})
+        if not self.fix_point(()):
+            # pas de solution, sans même brancher
+            return
+
+        stack: list[tuple[Variable, int, int]] = []
+        consistent = True
+
+        while True:
+            if consistent:
+                self.n_recur += 1
+
+                # Choisissez une variable non fixée (la plus petite par défaut)
+                variable = select_variable()
+
+                if variable is None:
+                    # Toutes les variables sont fixées, une solution est trouvée
+                    self.call_handlers("solution", {})
+                    consistent = False
+                else:
+                    value = variable.dom.min()
+                    # Branche droite explorée plus tard, depuis l'état courant
+                    stack.append((variable, value, len(self.trail)))
+
+                    # Branche gauche : affecter la valeur à la variable
+                    if variable.dom.fix(value) == PROP_FAIL or not self.fix_point(()):
+                        if self._h_inconsistent:
+                            self.call_handlers(
+                                "inconsistent", {"event": "inconsistent", "current_var": variable})
+                        consistent = False
+                    continue
+
+            if not stack:
+                break
 
             # Restaurer les domaines avant d'explorer la branche droite
-            self.restore_domains(backup)
+            variable, value, mark = stack.pop()
+            self.restore_trail(mark)
 
             # Branche droite : retirer la valeur du domaine de la variable
-            try:
-                variable.dom.remove(value)
-                self.fix_point()
-                self.dfs()
-            except Inconsistency:
-                self.call_handlers(
-                    "inconsistent", {"event": "inconsistent", "current_var": variable})
+            if variable.dom.remove(value) == PROP_FAIL or not self.fix_point(()):
+                if self._h_inconsistent:
+                    self.call_handlers(
+                        "inconsistent", {"event": "inconsistent", "current_var": variable})
+                consistent = False
+            else:
+                consistent = True
 
     ##############################################################################
     # Event handler registration and management
@@ -422,6 +948,34 @@ class ToyCSP:
             self.handlers[event].append(handler)
         else:
             self.handlers[event] = [handler]
+        self._bind_emitters()
+
+    def _bind_emitters(self) -> None:
+        """
+        Binds the emitters called on the hot paths: when no handler listens to
+        an event, its emitter does nothing and no infos dict is built.
+        """
+        if self.handlers.get("propagate"):
+            self._emit_propagate = self._call_propagate_handlers
+        else:
+            self._emit_propagate = self._skip_event
+        # handlers of the other frequent events, None when there are none
+        self._h_beforefixpoint = self.handlers.get("beforefixpoint") or None
+        self._h_afterfixpoint = self.handlers.get("afterfixpoint") or None
+        self._h_inconsistent = self.handlers.get("inconsistent") or None
+
+    def _call_propagate_handlers(self, constraint: Constraint, status: int) -> None:
+        """Calls the handlers of the `propagate` event."""
+        self.call_handlers("propagate", {
+            "event": "propagating",
+            "usefull": status == PROP_CHANGED,
+            "constraint": constraint,
+        })
+
+    @staticmethod
+    def _skip_event(*args) -> None:
+        """Emitter used for the events without handlers."""
+        pass
 
     def call_handlers(self, event: str, infos: dict[str, Any]) -> None:
         """Calls all registered handlers for a specific event."""
@@ -1,20 +1,27 @@
-from toycsp import ToyCSP, Variable, NotEqual
+from toycsp import ToyCSP, Variable, QueensPair
 
 def nqueens(n: int):
+    # aucune dame : la seule solution est le placement vide
+    if n == 0:
+        return [[]]
+
     # problème
     csp: ToyCSP = ToyCSP()
     # variables de décision
     q: list[Variable] = [csp.add_variable(range(n)) for _ in range(n)]
 
+    # Symétrie : le reflet d'une solution (q[i] -> n - 1 - q[i]) est aussi
+    # une solution, il suffit de chercher celles où la première dame est dans
+    # la moitié basse
+    q[0].dom.remove_above((n - 1) // 2)
+
     ## Déclaration des contraintes du problème
+    # (propagées une seule fois, au début de la recherche)
     for i in range(n):
         for j in range(i + 1, n):
-            # Pas deux reines sur la même ligne,
-            csp.post(NotEqual(q[i], q[j], 0))
-            # Pas deux reines sur une diagonale montante
-            csp.post(NotEqual(q[i], q[j], i - j))
-            # Pas deux reines sur une diagonale descendante
-            csp.post(NotEqual(q[i], q[j], j - i))
+            # Pas deux reines sur la même ligne ni sur une même diagonale
+            # (montante ou descendante)
+            csp.post(QueensPair(q[i], q[j], j - i), schedule_fixpoint=False)
     
     @csp.on('solution')
     def handle_solution(csp, infos):
@@ -23,7 +30,12 @@ def nqueens(n: int):
 
     solutions = []
     csp.dfs()
-    
+
+    # ajouter les reflets (sauf si la première dame est au milieu : son
+    # reflet a déjà été trouvé par la recherche)
+    solutions += [[n - 1 - v for v in sol] for sol in solutions if 2 * sol[0] != n - 1]
+    solutions.sort()
+
     return solutions
 
 # profiling : https://realpython.com/python-profiling/
@@ -5,6 +5,16 @@ def check_constraints(q: Iterable[int]) -> bool:
     Vérifie que toutes les contraintes du problème soient satisfaites dans la
     solution ``q`` représentant la ligne sur laquelle est placée chaque dames
     q[i]
+
+    La recherche vérifie chaque dame en la posant (``check_queen``) : cette
+    fonction sert à contrôler les solutions complètes
+
+    >>> check_constraints([1, 3, 0, 2])
+    True
+    >>> check_constraints([1, 3, 2, 0])
+    False
+    >>> all(check_constraints(s) for s in nqueens_solver(6))
+    True
     '''
     n = len(q)
 
@@ -17,7 +27,26 @@ def check_constraints(q: Iterable[int]) -> bool:
     return True
 
 
-def nqueens_solver(n: int) -> None:
+def check_queen(q: Iterable[int], i: int) -> bool:
+    '''
+    Vérifie que la dame q[i] n'est attaquée par aucune des dames q[0..i-1]
+
+    >>> check_queen([1, 3, 0], 2)
+    True
+    >>> check_queen([1, 3, 2], 2)
+    False
+    '''
+    qi = q[i]
+    for j in range(i):
+        qj = q[j]
+        if qi == qj: return False
+        if qi - qj == i - j: return False
+        if qj - qi == i - j: return False
+
+    return True
+
+
+def nqueens_solver(n: int) -> list[list[int]]:
     '''
     Retourne toutes les solutions pour le problème des n dames
 
@@ -32,27 +61,27 @@ def nqueens_solver(n: int) -> None:
     >>> nqueens_solver(n=5)
     [[0, 2, 4, 1, 3], [0, 3, 1, 4, 2], [1, 3, 0, 2, 4], [1, 4, 2, 0, 3], [2, 0, 3, 1, 4], [2, 4, 1, 3, 0], [3, 0, 2, 4, 1], [3, 1, 4, 2, 0], [4, 1, 3, 0, 2], [4, 2, 0, 3, 1]]
     '''
-    def on_solution(queens: list[int]) -> None:
-        solutions.append(queens)
-        
-        
     def dfs(queens: Iterable[int], index: int = 0) -> None:
-        n = len(queens)
         if index == n:
-            if check_constraints(queens):
-                # Attention à faire une copie de la liste `queens`
-                on_solution(queens[:])
+            # chaque dame a été vérifiée en la posant : toutes les
+            # contraintes sont satisfaites
+            # Attention à faire une copie de la liste `queens`
+            append(queens[:])
         else:
             for i in range(n):
                 queens[index] = i
-                dfs(queens, index=index + 1)
+                # couper la branche dès qu'une dame est attaquée plutôt que
+                # de tester les n^n placements complets
+                if check_queen(queens, index):
+                    dfs(queens, index + 1)
 
 
     # Préparation du tableau utilisé pour représenter la solution
     queens = [None] * n
     solutions = []
+    append = solutions.append
 
-    # Générer tous les placements de dames imaginables
+    # Générer les placements de dames compatibles
     # => feuilles de l'arbre de recherche
 
     dfs(queens)
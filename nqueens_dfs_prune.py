@@ -1,42 +1,179 @@
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable
 
 def nqueens_solver(n: int) -> None:
+    '''
+    Retourne toutes les solutions pour le problème des n dames
 
-    def on_solution(queens: Iterable[int]) -> None:
-        solutions.append(queens)
-        
-    def check_constraints(q: Iterable[int], i: int) -> bool:
-        n = len(q)
+    >>> nqueens_solver(n=1)
+    [[0]]
+    >>> nqueens_solver(n=2)
+    []
+    >>> nqueens_solver(n=4)
+    [[1, 3, 0, 2], [2, 0, 3, 1]]
+    >>> nqueens_solver(n=5)
+    [[0, 2, 4, 1, 3], [0, 3, 1, 4, 2], [1, 3, 0, 2, 4], [1, 4, 2, 0, 3], [2, 0, 3, 1, 4], [2, 4, 1, 3, 0], [3, 0, 2, 4, 1], [3, 1, 4, 2, 0], [4, 1, 3, 0, 2], [4, 2, 0, 3, 1]]
+    >>> len(nqueens_solver(n=8))
+    92
+    '''
 
-        for j in range(0, i):
-            if q[i] == q[j]: return False
-            if q[i] - q[j] == i - j: return False
-            if q[j] - q[i] == i - j: return False
-
-        return True
-
-
-    def dfs(queens: Iterable[int], index: int = 0) -> None:
-        n = len(queens)
+    def dfs(queens: Iterable[int], index: int, cols: int, d1: int, d2: int) -> None:
+        '''
+        Place la dame de la colonne ``index``. Les lignes déjà attaquées sont
+        représentées par des masques de bits : ``cols`` pour les lignes
+        occupées, ``d1`` et ``d2`` pour les deux diagonales, décalées d'un
+        cran à chaque colonne. Une ligne libre se teste donc en O(1), sans
+        parcourir les dames déjà placées.
+        '''
         if index == n:
                 # Attention à faire une copie de la liste `queens`
-                on_solution(queens[:])
+                append(queens[:])
         else:
-            for i in range(n):
-                queens[index] = i
-                if check_constraints(queens, i=index):
-                    dfs(queens, index=index + 1)
-                queens[index] = None
+            free = full & ~(cols | d1 | d2)
+            while free:
+                # la plus petite ligne libre
+                bit = free & -free
+                free ^= bit
+                queens[index] = bit.bit_length() - 1
+                dfs(queens, index + 1, cols | bit, (d1 | bit) << 1, (d2 | bit) >> 1)
+            queens[index] = None
 
     solutions = []
+    # constantes de la recherche, lues depuis la fermeture de `dfs`
+    append = solutions.append
+    full = (1 << n) - 1
 
     # Préparation du tableau utilisé pour représenter la solution
     queens = [None] * n
 
-    # Générer tous les placements de dames imaginables
-    # => feuilles de l'arbre de recherche
-    dfs(queens)
-    
+    if n == 0:
+        return [[]]
+
+    # Symétrie : le reflet d'une solution (q[i] -> n - 1 - q[i]) est aussi une
+    # solution, il suffit de placer la première dame dans la moitié basse
+    for row in range((n + 1) // 2):
+        bit = 1 << row
+        queens[0] = row
+        dfs(queens, 1, bit, bit << 1, bit >> 1)
+
+    # ajouter les reflets (sauf si la première dame est au milieu : son
+    # reflet a déjà été trouvé par la recherche)
+    solutions += [[n - 1 - q for q in sol] for sol in solutions if 2 * sol[0] != n - 1]
+    solutions.sort()
+
+    return solutions
+
+
+def nqueens_count(n: int) -> int:
+    '''
+    Retourne le nombre de solutions pour le problème des n dames, avec le même
+    parcours que ``nqueens_solver`` mais sans construire les solutions : la
+    recherche ne manipule que des entiers.
+
+    >>> [nqueens_count(n) for n in range(0, 9)]
+    [1, 1, 0, 0, 2, 10, 4, 40, 92]
+    '''
+    full = (1 << n) - 1
+
+    def count(cols: int, d1: int, d2: int) -> int:
+        if cols == full:
+            # une dame sur chaque ligne
+            return 1
+        total = 0
+        free = full & ~(cols | d1 | d2)
+        while free:
+            bit = free & -free
+            free ^= bit
+            total += count(cols | bit, (d1 | bit) << 1, (d2 | bit) >> 1)
+        return total
+
+    if n == 0:
+        return 1
+
+    # Symétrie : les solutions dont la première dame est dans la moitié haute
+    # sont les reflets de celles de la moitié basse
+    total = 0
+    for row in range(n // 2):
+        bit = 1 << row
+        total += 2 * count(bit, bit << 1, bit >> 1)
+    if n % 2 == 1:
+        # ligne du milieu : reflets déjà comptés
+        bit = 1 << (n // 2)
+        total += count(bit, bit << 1, bit >> 1)
+    return total
+
+
+# Python refuse plus de 20 blocs imbriqués : au-delà, pas de code généré
+MAX_UNROLLED = 20
+
+# solveurs déjà générés, par n
+_solvers: dict[int, Callable[[Callable[[list[int]], None]], None]] = {}
+
+
+def compile_solver(n: int) -> Callable[[Callable[[list[int]], None]], None]:
+    '''
+    Génère le code Python d'un solveur spécialisé pour n dames, sans aucun
+    appel récursif : une boucle ``while`` imbriquée par colonne, avec le
+    masque des n lignes écrit en littéral. Le solveur appelle la fonction
+    passée en paramètre avec chaque solution. Le code n'est généré qu'une
+    fois par n.
+
+    >>> solutions = []
+    >>> compile_solver(4)(solutions.append)
+    >>> solutions
+    [[1, 3, 0, 2], [2, 0, 3, 1]]
+    >>> compile_solver(4) is compile_solver(4)
+    True
+    '''
+    if n in _solvers:
+        return _solvers[n]
+    if not 1 <= n <= MAX_UNROLLED:
+        raise ValueError(f"n must be between 1 and {MAX_UNROLLED}")
+
+    full = (1 << n) - 1
+    lines = [f'def solve_{n}(on_solution):', '    cols0 = d1_0 = d2_0 = 0']
+    indent = '    '
+    for k in range(n):
+        # colonne k : parcourir ses lignes libres
+        lines += [
+            f'{indent}free{k} = {full:#b} & ~(cols{k} | d1_{k} | d2_{k})',
+            f'{indent}while free{k}:',
+        ]
+        indent += '    '
+        lines += [
+            f'{indent}bit{k} = free{k} & -free{k}',
+            f'{indent}free{k} ^= bit{k}',
+        ]
+        if k < n - 1:
+            lines += [
+                f'{indent}cols{k + 1} = cols{k} | bit{k}',
+                f'{indent}d1_{k + 1} = (d1_{k} | bit{k}) << 1',
+                f'{indent}d2_{k + 1} = (d2_{k} | bit{k}) >> 1',
+            ]
+    queens = ', '.join(f'bit{k}.bit_length() - 1' for k in range(n))
+    lines.append(f'{indent}on_solution([{queens}])')
+
+    namespace: dict[str, Callable[[Callable[[list[int]], None]], None]] = {}
+    exec('\n'.join(lines), namespace)
+    _solvers[n] = namespace[f'solve_{n}']
+    return _solvers[n]
+
+
+def nqueens_solver_compiled(n: int) -> list[list[int]]:
+    '''
+    Même résultat que ``nqueens_solver``, avec le solveur généré par
+    ``compile_solver`` quand n le permet
+
+    >>> nqueens_solver_compiled(n=5) == nqueens_solver(n=5)
+    True
+    >>> len(nqueens_solver_compiled(n=8))
+    92
+    >>> nqueens_solver_compiled(n=0)
+    [[]]
+    '''
+    if not 1 <= n <= MAX_UNROLLED:
+        return nqueens_solver(n)
+    solutions = []
+    compile_solver(n)(solutions.append)
     return solutions
 
 
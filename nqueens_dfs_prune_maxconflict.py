@@ -31,35 +31,37 @@ def mid_first(values: list[int]) -> list[int]:
     return result
     
     
-def nqueens_solver(n: int) -> None:
+def nqueens_solver(n: int) -> list[Solution]:
 
-    def on_solution(queens: Solution) -> None:
-        solutions.append(queens)
-        
     def check_constraints(q: PartialSolution, i: int) -> bool:
-        n = len(q)
+        # les dames q[0..i] sont placées
+        placed = cast(Solution, q)
+        qi = placed[i]
 
         for j in range(0, i):
-            if cast(int, q[i]) == cast(int, q[j]): return False
-            if cast(int, q[i]) - cast(int, q[j]) == i - j: return False
-            if cast(int, q[j]) - cast(int, q[i]) == i - j: return False
+            qj = placed[j]
+            if qi == qj: return False
+            if qi - qj == i - j: return False
+            if qj - qi == i - j: return False
 
         return True
 
 
     def dfs(queens: PartialSolution, index: int = 0) -> None:
-        n = len(queens)
         if index == n:
                 # Attention à faire une copie de la liste `queens`
-                on_solution(cast(Solution, queens[:]))
+                append(cast(Solution, queens[:]))
         else:
-            for i in mid_first(list(range(n))):
+            for i in order:
                 queens[index] = i
-                if check_constraints(queens, i=index):
-                    dfs(queens, index=index + 1)
+                if check_constraints(queens, index):
+                    dfs(queens, index + 1)
                 queens[index] = None
 
-    solutions = []
+    solutions: list[Solution] = []
+    # constantes de la recherche, calculées une seule fois
+    append = solutions.append
+    order = mid_first(list(range(n)))
 
     # Préparation du tableau utilisé pour représenter la solution
     queens: PartialSolution = [None] * n
@@ -68,6 +70,8 @@ def nqueens_solver(n: int) -> None:
     # => feuilles de l'arbre de recherche
     dfs(queens)
 
+    return solutions
+
 
 if __name__ == '__main__':
     # solutions = nqueens_solver(n=4)
@@ -0,0 +1,191 @@
+'''
+Solveur spécialisé pour le problème des n dames.
+
+Même modèle que ``nqueens_short.py`` (contraintes x != y + offset entre chaque
+paire de dames, branchement sur la première variable non fixée et sa plus
+petite valeur), mais sans aucun objet : chaque domaine est un entier utilisé
+comme masque de bits, les contraintes sont stockées colonne par colonne
+dans trois tableaux ``xs``, ``ys`` et ``offsets`` (la contrainte k est
+q[xs[k]] != q[ys[k]] + offsets[k]), la propagation est faite par du code
+Python généré pour ces contraintes et la recherche utilise une pile
+explicite au lieu de la récursion.
+'''
+
+from array import array
+from collections.abc import Callable
+
+type Constraints = tuple[array, array, array]
+
+
+def build_constraints(n: int) -> Constraints:
+    '''
+    Tableaux ``(xs, ys, offsets)`` des contraintes
+    q[xs[k]] != q[ys[k]] + offsets[k] du problème des n dames
+
+    >>> xs, ys, offsets = build_constraints(3)
+    >>> xs.tolist(), ys.tolist(), offsets.tolist()
+    ([0, 0, 0, 0, 0, 0, 1, 1, 1], [1, 1, 1, 2, 2, 2, 2, 2, 2], [0, -1, 1, 0, -2, 2, 0, -1, 1])
+    '''
+    xs, ys, offsets = array('i'), array('i'), array('i')
+    for i in range(n):
+        for j in range(i + 1, n):
+            # même ligne, diagonale montante, diagonale descendante
+            for offset in (0, i - j, j - i):
+                xs.append(i)
+                ys.append(j)
+                offsets.append(offset)
+    return xs, ys, offsets
+
+
+type Propagator = Callable[[list[int], list[int]], bool]
+
+# propagateurs déjà générés, par contraintes
+_propagators: dict[bytes, list[list[Propagator]]] = {}
+
+
+def compile_propagators(n: int, constraints: Constraints) -> list[list[Propagator]]:
+    '''
+    Génère, pour chaque variable q[i] et chaque valeur v, une fonction Python
+    ``propagators[i][v](masks, fixed)`` à appeler quand q[i] est fixée à v :
+    les contraintes de q[i] y sont déroulées, avec un seul ``&`` par voisine
+    et le masque des valeurs permises écrit en littéral. Les variables
+    qu'elle fixe sont ajoutées à ``fixed``. Elle retourne ``False`` si un
+    domaine devient vide.
+
+    Le code n'est généré qu'une fois pour un même ensemble de contraintes.
+
+    >>> propagators = compile_propagators(4, build_constraints(4))
+    >>> masks = [0b0010, 0b1111, 0b1111, 0b1111]
+    >>> fixed = []
+    >>> propagators[0][1](masks, fixed), fixed
+    (True, [1])
+    >>> [bin(m) for m in masks]
+    ['0b10', '0b1000', '0b101', '0b1101']
+    >>> compile_propagators(4, build_constraints(4)) is propagators
+    True
+    '''
+    xs, ys, offsets = constraints
+    key = n.to_bytes(4) + xs.tobytes() + ys.tobytes() + offsets.tobytes()
+    if key in _propagators:
+        return _propagators[key]
+
+    # forbidden[i][v][j] : valeurs de q[j] interdites par q[i] = v
+    forbidden: list[list[dict[int, int]]] = [[{} for v in range(n)] for i in range(n)]
+    for i, j, offset in zip(xs, ys, offsets):
+        for v in range(n):
+            # q[i] = v : retirer v - offset du domaine de q[j]
+            w = v - offset
+            if 0 <= w < n:
+                forbidden[i][v][j] = forbidden[i][v].get(j, 0) | 1 << w
+            # q[j] = v : retirer v + offset du domaine de q[i]
+            w = v + offset
+            if 0 <= w < n:
+                forbidden[j][v][i] = forbidden[j][v].get(i, 0) | 1 << w
+
+    full = (1 << n) - 1
+    lines = []
+    for i in range(n):
+        for v in range(n):
+            lines.append(f'def propagate_{i}_{v}(masks, fixed):')
+            for j, bits in sorted(forbidden[i][v].items()):
+                lines += [
+                    f'    mask = masks[{j}]',
+                    f'    keep = mask & {full & ~bits:#b}',
+                    f'    if keep != mask:',
+                    f'        if not keep:',
+                    f'            return False',
+                    f'        masks[{j}] = keep',
+                    f'        if not keep & (keep - 1):',
+                    f'            fixed.append({j})',
+                ]
+            lines.append('    return True')
+    namespace: dict[str, Propagator] = {}
+    exec('\n'.join(lines), namespace)
+
+    propagators = [[namespace[f'propagate_{i}_{v}'] for v in range(n)] for i in range(n)]
+    _propagators[key] = propagators
+    return propagators
+
+
+def propagate(masks: list[int], propagators: list[list[Propagator]], fixed: list[int]) -> bool:
+    '''
+    Propage les variables ``fixed`` (nouvellement fixées) sur les domaines
+    ``masks`` jusqu'au point fixe. Retourne ``False`` si un domaine devient
+    vide.
+
+    Chaque variable fixée est traitée une seule fois, par son propagateur
+    généré (voir ``compile_propagators``).
+
+    >>> masks = [0b0010, 0b1111, 0b1111, 0b1111]
+    >>> propagate(masks, compile_propagators(4, build_constraints(4)), [0])
+    True
+    >>> [bin(m) for m in masks]
+    ['0b10', '0b1000', '0b1', '0b100']
+    '''
+    while fixed:
+        i = fixed.pop()
+        if not propagators[i][masks[i].bit_length() - 1](masks, fixed):
+            return False
+    return True
+
+
+def nqueens_solver(n: int) -> list[list[int]]:
+    '''
+    Retourne toutes les solutions pour le problème des n dames
+
+    >>> nqueens_solver(n=1)
+    [[0]]
+    >>> nqueens_solver(n=2)
+    []
+    >>> nqueens_solver(n=3)
+    []
+    >>> nqueens_solver(n=4)
+    [[1, 3, 0, 2], [2, 0, 3, 1]]
+    >>> nqueens_solver(n=5)
+    [[0, 2, 4, 1, 3], [0, 3, 1, 4, 2], [1, 3, 0, 2, 4], [1, 4, 2, 0, 3], [2, 0, 3, 1, 4], [2, 4, 1, 3, 0], [3, 0, 2, 4, 1], [3, 1, 4, 2, 0], [4, 1, 3, 0, 2], [4, 2, 0, 3, 1]]
+    >>> len(nqueens_solver(n=8))
+    92
+    '''
+    propagators = compile_propagators(n, build_constraints(n))
+    solutions = []
+
+    # chaque noeud de la pile contient les domaines et les variables
+    # nouvellement fixées à propager
+    masks = [(1 << n) - 1] * n
+    stack = [(masks, [i for i, m in enumerate(masks) if not m & (m - 1)])]
+    while stack:
+        masks, fixed = stack.pop()
+        if not propagate(masks, propagators, fixed):
+            continue
+
+        # première variable non fixée
+        for i in range(n):
+            mask = masks[i]
+            if mask & (mask - 1):
+                break
+        else:
+            # toutes les variables sont fixées : solution
+            solutions.append([m.bit_length() - 1 for m in masks])
+            continue
+
+        smallest = mask & -mask
+
+        # branche droite : retirer la plus petite valeur (explorée en second)
+        right = masks[:]
+        right[i] = mask ^ smallest
+        stack.append((right, [] if right[i] & (right[i] - 1) else [i]))
+
+        # branche gauche : fixer la plus petite valeur
+        left = masks[:]
+        left[i] = smallest
+        stack.append((left, [i]))
+
+    return solutions
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    solutions = nqueens_solver(n=4)
+    print(solutions)
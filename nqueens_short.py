@@ -6,9 +6,9 @@ def nqueens_solver(n: int) -> list[list[int]]:
 
     for i in range(n):
         for j in range(i + 1, n):
-            csp.post(NotEqual(q[i], q[j], 0))
-            csp.post(NotEqual(q[i], q[j], i - j))
-            csp.post(NotEqual(q[i], q[j], j - i))
+            csp.post(NotEqual(q[i], q[j], 0), schedule_fixpoint=False)
+            csp.post(NotEqual(q[i], q[j], i - j), schedule_fixpoint=False)
+            csp.post(NotEqual(q[i], q[j], j - i), schedule_fixpoint=False)
 
     @csp.on('solution')
     def handle_solution(csp, infos):
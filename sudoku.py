@@ -1,11 +1,9 @@
-from toycsp import ToyCSP, Variable, NotEqual
+from toycsp import ToyCSP, Variable, AllDifferent
 from itertools import product
 
 def all_different(csp: ToyCSP, vars: list[Variable]) -> None:
-    n = len(vars)
-    for i in range(n):
-        for j in range(i + 1, n):
-            csp.post(NotEqual(vars[i], vars[j]))
+    # une seule contrainte pour les 9 cases plutôt que 36 NotEqual
+    csp.post(AllDifferent(vars), schedule_fixpoint=False)
 
 csp: ToyCSP = ToyCSP()
 
@@ -66,8 +64,10 @@ all_different(csp, [X[i][j] for i in range(6, 9) for j in range(6, 9)])
 '''
 
 def show_solution():
+    # les variables ont été créées ligne par ligne
+    solution = csp.get_solution()
     for i in range(9):
-        print(" ".join(str(X[i][j].value()) for j in range(9)))
+        print(" ".join(str(v) for v in solution[9 * i:9 * i + 9]))
         
 @csp.on('solution')
 def handle_solution(csp, infos):
@@ -2,5 +2,8 @@ from .csp import *
 from .domain import *
 from .exceptions import *
 from .not_equal import *
+from .queens_pair import *
+from .all_different import *
+from .status import *
 from .variable import *
 from .constraint import *
\ No newline at end of file
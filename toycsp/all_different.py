@@ -0,0 +1,80 @@
+from collections.abc import Iterable
+from typing import override
+
+from .constraint import Constraint
+from .variable import Variable
+from .status import PROP_UNCHANGED, PROP_CHANGED, PROP_FAIL
+
+class AllDifferent(Constraint):
+    """
+    Constraint stating that the variables all take different values.
+
+    Same filtering as a NotEqual between each pair of variables (the values
+    of the fixed variables are removed from the others), in a single
+    constraint working on the bitmasks of the domains.
+    """
+
+    __slots__ = ('vars', 'queued', 'doms', 'shifts')
+
+    # a single call removes all the values it can
+    idempotent = True
+
+    def __init__(self, vars: Iterable[Variable]) -> None:
+        """
+        Initializes the AllDifferent constraint.
+
+        Args:
+            vars: The variables that must take different values.
+        """
+        self.vars = tuple(vars)
+        self.queued = False
+        self.doms = tuple(var.dom for var in self.vars)
+        # the masks are compared with the smallest offset: the mask of each
+        # domain is shifted up by the difference of its offset with it
+        base = min((dom.offset for dom in self.doms), default=0)
+        self.shifts = tuple(dom.offset - base for dom in self.doms)
+
+    @override
+    def propagate(self) -> int:
+        """
+        Propagates the AllDifferent constraint: removes the values of the fixed
+        variables from the domains of the other ones, until no new variable
+        gets fixed.
+
+        Returns:
+            PROP_CHANGED if any value was removed from a domain, PROP_FAIL if
+            two variables are fixed to the same value or a domain would become
+            empty, PROP_UNCHANGED otherwise.
+        """
+        status = PROP_UNCHANGED
+        n_fixed = -1
+        while True:
+            # union of the values of the fixed variables
+            fixed = 0
+            count = 0
+            for dom, shift in zip(self.doms, self.shifts):
+                mask = dom.mask
+                if not mask & (mask - 1):
+                    mask <<= shift
+                    if fixed & mask:
+                        return PROP_FAIL
+                    fixed |= mask
+                    count += 1
+            if count == n_fixed:
+                return status
+            n_fixed = count
+
+            for dom, shift in zip(self.doms, self.shifts):
+                mask = dom.mask
+                if mask & (mask - 1):
+                    removed = dom.remove_mask(fixed >> shift)
+                    if removed == PROP_FAIL:
+                        return PROP_FAIL
+                    if removed == PROP_CHANGED:
+                        status = PROP_CHANGED
+
+    def __repr__(self) -> str:
+        return f'AllDifferent(vars={list(self.vars)})'
+
+    def __str__(self) -> str:
+        return f'alldifferent({", ".join(var.name for var in self.vars)})'
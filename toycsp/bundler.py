@@ -16,10 +16,13 @@ codelines = []
 my_modules = [
     'types',
     'exceptions',
+    'status',
     'domain',
     'variable',
     'constraint',
     'not_equal',
+    'queens_pair',
+    'all_different',
     'csp',
 ]
 
@@ -1,16 +1,58 @@
 from abc import ABC, abstractmethod
 
+from .variable import Variable
+from .status import PROP_UNCHANGED
+
 class Constraint(ABC):
     """
     Abstract base class for constraints.
+
+    Each constraint exposes the variables it is defined on in `vars`: the
+    solver only propagates it again when the domain of one of them changes.
+
+    A constraint is propagated again after its own changes too, unless it is
+    `idempotent`: set it to True only if one call to `propagate` always
+    reaches the fix point of the constraint.
+
+    >>> from toycsp.csp import ToyCSP
+    >>> class LessThan(Constraint):  # x < y, at most one removal per call
+    ...     def __init__(self, x, y):
+    ...         self.x, self.y = x, y
+    ...         self.vars = (x, y)
+    ...     def propagate(self):
+    ...         dx, dy = self.x.dom, self.y.dom
+    ...         if dx.max() >= dy.max():
+    ...             return dx.remove(dx.max())
+    ...         if dy.min() <= dx.min():
+    ...             return dy.remove(dy.min())
+    ...         return PROP_UNCHANGED
+    >>> solutions = []
+    >>> csp = ToyCSP(on_solution=lambda csp, infos: solutions.append(csp.get_solution()))
+    >>> x, y = csp.add_variable(range(3)), csp.add_variable(range(3))
+    >>> c = csp.post(LessThan(x, y))
+    >>> x.dom.values, y.dom.values
+    ({0, 1}, {1, 2})
+    >>> csp.dfs()
+    >>> sorted(solutions)
+    [[0, 1], [0, 2], [1, 2]]
     """
 
+    # no instance __dict__ here, so that subclasses declaring __slots__ get none
+    __slots__ = ()
+
+    vars: tuple[Variable, ...] = ()
+    # True while the constraint waits in the propagation queue of the CSP
+    queued: bool = False
+    # True if `propagate` reaches the fix point of the constraint in one call
+    idempotent: bool = False
+
     @abstractmethod
-    def propagate(self) -> bool:
+    def propagate(self) -> int:
         """
-        Propagate the constraint and return True if any value could be removed.
+        Propagate the constraint.
 
         Returns:
-            True if at least one value of one variable could be removed, False otherwise.
+            PROP_CHANGED if at least one value of one variable could be removed,
+            PROP_FAIL if a domain would become empty and PROP_UNCHANGED otherwise.
         """
-        pass
\ No newline at end of file
+        pass
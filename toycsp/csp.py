@@ -1,9 +1,11 @@
+from collections import deque
 from collections.abc import Iterable
-from typing import Optional, Any, Callable, cast
+from typing import Any, Callable
 
 from .constraint import Constraint
 from .variable import Variable
 from .exceptions import Inconsistency
+from .status import PROP_CHANGED, PROP_FAIL
 from .domain import Domain
 from .not_equal import NotEqual
 from .types import Solution, PartialSolution
@@ -18,12 +20,25 @@ class ToyCSP:
 
         self.constraints: list[Constraint] = []
         self.variables: list[Variable] = []
-        self.n_recur: int = 0  # Number of recursive calls
+        # constraints to propagate again when the domain of a variable
+        # changes, indexed by `Variable.idx`
+        self.var_to_constraints: list[list[Constraint]] = []
+        # propagation queue (AC-3), see also `Constraint.queued`
+        self.queue: deque[Constraint] = deque()
+        # undo log of the domain changes: (domain, mask before the change)
+        self.trail: list[tuple[Domain, int]] = []
+        # indices of the variables whose domain changed since their
+        # constraints were last scheduled
+        self.dirty: list[int] = []
+        self.n_recur: int = 0  # Number of search nodes visited by dfs
+        # False when constraints were posted since the last sort_constraints
+        self._sorted: bool = True
 
         # collects all handlers (args beginning with `on_`)
         self.handlers = {
             arg.split('on_')[1]: [value] for arg, value in kwargs.items() if arg.startswith("on_")
         }
+        self._bind_emitters()
 
     def __repr__(self) -> str:
         # return f"ToyCSP(constraints={self.constraints}, variables={self.variables})"
@@ -41,44 +56,94 @@ class ToyCSP:
             A new Variable object.
         """
         var = Variable(domain, name)
+        var.idx = var.dom.idx = len(self.variables)
+        var.dom.trail = self.trail
+        var.dom.dirty = self.dirty
         self.variables.append(var)
+        self.var_to_constraints.append([])
         return var
 
     def post(self, constraint: Constraint, schedule_fixpoint=True) -> Constraint:
         """
         Posts (adds) a constraint to the CSP and optionally schedules a fix point.
 
+        The constraint is put in the propagation queue: when no fix point is
+        computed right away, it is propagated by the next call to `fix_point`.
+
         Args:
             constraint: The constraint to add.
             schedule_fixpoint: If True, schedules a fix point after adding the constraint.
 
         Returns:
             The added constraint.
+
+        Raises:
+            ValueError: If the constraint has no variables (`vars` is empty),
+                or is defined on a variable that was not created by
+                `add_variable` on this CSP.
+            Inconsistency: If the fix point fails, i.e. the problem has no
+                solution.
         """
+        if not constraint.vars:
+            # it would never be scheduled again after its first propagation
+            raise ValueError(f"{constraint!r} does not declare its variables in `vars`")
+        variables = self.variables
+        for var in constraint.vars:
+            if not 0 <= var.idx < len(variables) or variables[var.idx] is not var:
+                raise ValueError(f"{var} is not a variable of this CSP")
         self.constraints.append(constraint)
-        if schedule_fixpoint:
-            self.fix_point()
+        self._sorted = False
+        for var in constraint.vars:
+            self.var_to_constraints[var.idx].append(constraint)
+        self.schedule(constraint)
+        if schedule_fixpoint and not self.fix_point(()):
+            raise Inconsistency
         return constraint
 
-    def backup_domains(self) -> list[Domain]:
+    def schedule(self, constraint: Constraint) -> None:
+        """
+        Adds the constraint to the propagation queue unless it is already in it.
+
+        Args:
+            constraint: The constraint to propagate.
+        """
+        if not constraint.queued:
+            constraint.queued = True
+            self.queue.append(constraint)
+
+    def backup_domains(self) -> list[int]:
         """
         Creates a backup copy of all variable domains.
 
         Returns:
-            A list of Domain objects representing the backed-up domains.
+            A list of bitmasks representing the backed-up domains.
         """
-        backup = [var.dom.clone() for var in self.variables]
+        backup = [var.dom.mask for var in self.variables]
         return backup
 
-    def restore_domains(self, backup: list[Domain]) -> None:
+    def restore_domains(self, backup: list[int]) -> None:
         """
         Restores the domains of all variables from the backup.
 
         Args:
-            backup: A list of Domain objects representing the backed-up domains.
+            backup: A list of bitmasks representing the backed-up domains.
         """
-        for i, var in enumerate(self.variables):
-            var.dom = backup[i]
+        for var, mask in zip(self.variables, backup):
+            var.dom.mask = mask
+
+    def restore_trail(self, mark: int) -> None:
+        """
+        Undoes the domain changes recorded in the trail after position `mark`.
+
+        Args:
+            mark: Length of the trail (`len(self.trail)`) at the state to restore.
+        """
+        trail = self.trail
+        while len(trail) > mark:
+            dom, mask = trail.pop()
+            dom.mask = mask
+        # the undone changes no longer have to be propagated
+        self.dirty.clear()
 
     def get_partial_solution(self) -> PartialSolution:
         """
@@ -87,7 +152,7 @@ class ToyCSP:
         Returns:
             A list of integers or None representing the current partial solution.
         """
-        return [cast(Optional[int], var.value()) for var in self.variables]
+        return [var.value() for var in self.variables]
 
     def get_solution(self) -> Solution:
         """
@@ -98,10 +163,17 @@ class ToyCSP:
         Returns:
             A list of integers representing the solution.
         """
-        if not all(var.dom.is_fixed() for var in self.variables):
-            raise ValueError(
-                "Not all variables are fixed. No solution available.")
-        return [cast(int, v.value()) for v in self.variables]
+        # one pass over the bitmasks: a fixed domain has a single bit set,
+        # whose position plus the offset of the domain is the value
+        solution = []
+        for var in self.variables:
+            dom = var.dom
+            mask = dom.mask
+            if not mask or mask & (mask - 1):
+                raise ValueError(
+                    "Not all variables are fixed. No solution available.")
+            solution.append(mask.bit_length() - 1 + dom.offset)
+        return solution
 
     def first_not_fixed(self) -> Variable | None:
         """
@@ -123,82 +195,173 @@ class ToyCSP:
         min_size = float("inf")
         smallest_var = None
         for var in self.variables:
-            if not var.dom.is_fixed() and var.dom.size() < min_size:
-                min_size = var.dom.size()
+            # popcount of the bitmask, without the method calls of Domain
+            size = var.dom.mask.bit_count()
+            if 1 < size < min_size:
+                min_size = size
                 smallest_var = var
-        # return smallest_var if smallest_var else None
+                if size == 2:
+                    # no unfixed domain can be smaller
+                    break
         return smallest_var
 
-    def fix_point(self) -> bool:
+    def fix_point(self, changed: Iterable[Variable] | None = None) -> bool:
         """
         Performs constraint propagation until no further changes occur.
 
-        Returns:
-            True if a fix point is reached (no more changes), False otherwise.
-        """
-        self.call_handlers("beforefixpoint", {"event": "before fixpoint"})
+        Only the constraints of the propagation queue are propagated: the
+        domains record the index of their variable in `dirty` when they
+        change, and only the constraints on these variables are scheduled
+        again (AC-3).
 
-        fix = False
-        while not fix:
-            fix = True
-            for constraint in self.constraints:
-                was_usefull = constraint.propagate()
-                # if only one propagation is usefull amongst all constraints,
-                # fix will become false and the while
-                # loop will continue
-                fix &= not was_usefull
-                self.call_handlers("propagate", {
-                    "event": f"propagating",
-                    "usefull": was_usefull,
-                    "constraint": constraint,
-                })
+        Args:
+            changed: Variables whose constraints are scheduled first, on top
+                of those whose domain changed since the last fix point. If
+                None, all the constraints are scheduled.
 
-        self.call_handlers("afterfixpoint", {"event": "after fixpoint"})
+        Constraints report a failure by returning PROP_FAIL; raising
+        Inconsistency is also supported.
+
+        Returns:
+            True if a fix point is reached (no more changes), False if a
+            domain would become empty.
+        """
+        if self._h_beforefixpoint:
+            self.call_handlers("beforefixpoint", {"event": "before fixpoint"})
 
-        return fix
+        var_to_constraints = self.var_to_constraints
+        dirty = self.dirty
 
-    def dfs(self, on_solution=None, on_fixpoint=None) -> None:
+        if changed is None:
+            for constraint in self.constraints:
+                self.schedule(constraint)
+        else:
+            for var in changed:
+                for constraint in var_to_constraints[var.idx]:
+                    self.schedule(constraint)
+        # domains changed outside of the fix point (e.g. by the search)
+        while dirty:
+            for constraint in var_to_constraints[dirty.pop()]:
+                self.schedule(constraint)
+
+        queue = self.queue
+        emit_propagate = self._emit_propagate
+        try:
+            while queue:
+                constraint = queue.popleft()
+                constraint.queued = False
+                status = constraint.propagate()
+                if status == PROP_FAIL:
+                    self._clear_queue()
+                    return False
+                # the constraints on the variables whose domain shrunk have
+                # to be propagated again, this one too unless it is idempotent
+                skip = constraint if constraint.idempotent else None
+                while dirty:
+                    for other in var_to_constraints[dirty.pop()]:
+                        if not other.queued and other is not skip:
+                            other.queued = True
+                            queue.append(other)
+                emit_propagate(constraint, status)
+        except Inconsistency:
+            self._clear_queue()
+            return False
+
+        if self._h_afterfixpoint:
+            self.call_handlers("afterfixpoint", {"event": "after fixpoint"})
+
+        return True
+
+    def sort_constraints(self) -> None:
+        """
+        Sorts the constraints, and the constraints of each variable, by the
+        indices of their variables: consecutive propagations then work on
+        neighbouring variables. The fix point does not depend on this order.
+        """
+        def key(constraint: Constraint) -> tuple[int, int]:
+            indices = [var.idx for var in constraint.vars]
+            return (min(indices, default=-1), sum(indices))
+
+        self.constraints.sort(key=key)
+        for constraints in self.var_to_constraints:
+            constraints.sort(key=key)
+        self._sorted = True
+
+    def _clear_queue(self) -> None:
+        """Empties the propagation queue and the dirty list after a failure."""
+        for constraint in self.queue:
+            constraint.queued = False
+        self.queue.clear()
+        self.dirty.clear()
+
+    def dfs(self, on_solution=None, on_fixpoint=None,
+            select_variable: Callable[[], Variable | None] | None = None) -> None:
         """
         Performs Depth-First Search (DFS) to find all solutions to the CSP.
 
+        The constraints that are still in the propagation queue (e.g. posted
+        with `schedule_fixpoint=False`) are propagated first, at the root.
+
+        The search is iterative: the right branches still to explore are kept
+        on an explicit stack as `(variable, value, trail mark)`.
+
         Args:
             on_solution: A callback function that receives a solution (variable assignments).
+            select_variable: Returns the next variable to branch on, or None
+                if all are fixed. Defaults to `smallest_not_fixed` (first-fail);
+                pass `self.first_not_fixed` to branch in the variable order.
         """
-        self.n_recur += 1
+        select_variable = select_variable or self.smallest_not_fixed
 
-        # Choisissez une variable non fixée (première rencontrée ou la plus petite)
-        not_fixed = (
-            self.first_not_fixed()
-        )  # Essayer d'abord first_not_fixed (implémentation originale)
+        if not self._sorted:
+            self.sort_constraints()
 
-        if not not_fixed:
-            # Toutes les variables sont fixées, une solution est trouvée
-            self.call_handlers("solution", {})
-        else:
-            variable = not_fixed
-            value = variable.dom.min()
-            backup = self.backup_domains()
-
-            # Branche gauche : affecter la valeur à la variable
-            try:
-                variable.dom.fix(value)
-                self.fix_point()
-                self.dfs()
-            except Inconsistency:
-                self.call_handlers(
-                    "inconsistent", {"event": "inconsistent", "current_var": variable})
+        if not self.fix_point(()):
+            # pas de solution, sans même brancher
+            return
+
+        stack: list[tuple[Variable, int, int]] = []
+        consistent = True
+
+        while True:
+            if consistent:
+                self.n_recur += 1
+
+                # Choisissez une variable non fixée (la plus petite par défaut)
+                variable = select_variable()
+
+                if variable is None:
+                    # Toutes les variables sont fixées, une solution est trouvée
+                    self.call_handlers("solution", {})
+                    consistent = False
+                else:
+                    value = variable.dom.min()
+                    # Branche droite explorée plus tard, depuis l'état courant
+                    stack.append((variable, value, len(self.trail)))
+
+                    # Branche gauche : affecter la valeur à la variable
+                    if variable.dom.fix(value) == PROP_FAIL or not self.fix_point(()):
+                        if self._h_inconsistent:
+                            self.call_handlers(
+                                "inconsistent", {"event": "inconsistent", "current_var": variable})
+                        consistent = False
+                    continue
+
+            if not stack:
+                break
 
             # Restaurer les domaines avant d'explorer la branche droite
-            self.restore_domains(backup)
+            variable, value, mark = stack.pop()
+            self.restore_trail(mark)
 
             # Branche droite : retirer la valeur du domaine de la variable
-            try:
-                variable.dom.remove(value)
-                self.fix_point()
-                self.dfs()
-            except Inconsistency:
-                self.call_handlers(
-                    "inconsistent", {"event": "inconsistent", "current_var": variable})
+            if variable.dom.remove(value) == PROP_FAIL or not self.fix_point(()):
+                if self._h_inconsistent:
+                    self.call_handlers(
+                        "inconsistent", {"event": "inconsistent", "current_var": variable})
+                consistent = False
+            else:
+                consistent = True
 
     ##############################################################################
     # Event handler registration and management
@@ -209,6 +372,34 @@ class ToyCSP:
             self.handlers[event].append(handler)
         else:
             self.handlers[event] = [handler]
+        self._bind_emitters()
+
+    def _bind_emitters(self) -> None:
+        """
+        Binds the emitters called on the hot paths: when no handler listens to
+        an event, its emitter does nothing and no infos dict is built.
+        """
+        if self.handlers.get("propagate"):
+            self._emit_propagate = self._call_propagate_handlers
+        else:
+            self._emit_propagate = self._skip_event
+        # handlers of the other frequent events, None when there are none
+        self._h_beforefixpoint = self.handlers.get("beforefixpoint") or None
+        self._h_afterfixpoint = self.handlers.get("afterfixpoint") or None
+        self._h_inconsistent = self.handlers.get("inconsistent") or None
+
+    def _call_propagate_handlers(self, constraint: Constraint, status: int) -> None:
+        """Calls the handlers of the `propagate` event."""
+        self.call_handlers("propagate", {
+            "event": "propagating",
+            "usefull": status == PROP_CHANGED,
+            "constraint": constraint,
+        })
+
+    @staticmethod
+    def _skip_event(*args) -> None:
+        """Emitter used for the events without handlers."""
+        pass
 
     def call_handlers(self, event: str, infos: dict[str, Any]) -> None:
         """Calls all registered handlers for a specific event."""
@@ -1,13 +1,18 @@
+from collections.abc import Iterable
 
-from .exceptions import Inconsistency
+from .status import PROP_UNCHANGED, PROP_CHANGED, PROP_FAIL
 
 
 class Domain:
     """
     Implementation of a very basic domain
-    using a set to store the values
+    using the bits of an integer (bitmask) to store the values:
+    value v belongs to the domain iff bit v - offset of `mask` is set,
+    where `offset` is the smallest initial value.
     """
 
+    __slots__ = ('trail', 'dirty', 'idx', 'mask', 'offset')
+
     def __init__(self, *args) -> None:
         """
         Initializes a domain with {0, ... ,n-1}
@@ -15,17 +20,72 @@ class Domain:
         Args:
             n: The number of values in the domain.
         """
+        # undo log shared with the CSP: each change pushes (domain, old mask)
+        self.trail: list[tuple[Domain, int]] | None = None
+        # list shared with the CSP where each change pushes `idx`, the index
+        # of the variable owning the domain (set together with `trail`)
+        self.dirty: list[int] | None = None
+        self.idx: int = -1
+
         if len(args) != 1:
             raise TypeError("Domain takes only one parameter")
         elif isinstance(args[0], int):
             n = args[0]
-            self.values = set(range(n))
+            self.mask: int = (1 << n) - 1 if n > 0 else 0
+            self.offset: int = 0
         elif isinstance(args[0], set):
-            dom = args[0]
-            self.values = dom.copy()
+            # bit i of the mask stands for the value offset + i
+            self.offset = min(args[0]) if args[0] else 0
+            self.mask = Domain.mask_of(args[0], self.offset)
         else:
             raise TypeError("Argument must be int or set[int]")
 
+    @classmethod
+    def from_range(cls, start: int, stop: int) -> "Domain":
+        """
+        Creates the domain {start, ..., stop-1} with a single shift, without
+        iterating over the values
+
+        Args:
+            start: The smallest value.
+            stop: The value following the largest one.
+
+        Returns:
+            A new Domain object.
+        """
+        dom = cls(0)
+        if stop > start:
+            dom.mask = (1 << (stop - start)) - 1
+            dom.offset = start
+        return dom
+
+    @staticmethod
+    def mask_of(values: Iterable[int], offset: int = 0) -> int:
+        """
+        Builds the bitmask representing the given values
+
+        Args:
+            values: The values to encode (none smaller than `offset`).
+            offset: The value represented by bit 0.
+
+        Returns:
+            An integer with bit v - offset set for each value v.
+        """
+        mask = 0
+        for v in values:
+            if v < offset:
+                raise ValueError("Domain values must not be smaller than the offset")
+            mask |= 1 << (v - offset)
+        return mask
+
+    @property
+    def values(self) -> set[int]:
+        """
+        The values of the domain as a set (built on demand, not for hot paths)
+        """
+        mask, offset = self.mask, self.offset
+        return {v + offset for v in range(mask.bit_length()) if (mask >> v) & 1}
+
     def is_fixed(self) -> bool:
         """
         Verifies if only one value left
@@ -33,7 +93,8 @@ class Domain:
         Returns:
             True if only one value left, False otherwise.
         """
-        return len(self.values) == 1
+        mask = self.mask
+        return mask != 0 and mask & (mask - 1) == 0
 
     def size(self) -> int:
         """
@@ -42,22 +103,26 @@ class Domain:
         Returns:
             The number of values in the domain.
         """
-        return len(self.values)
+        return self.mask.bit_count()
     
     def __len__(self) -> int:
         """
         Same as .size()
         """
-        return self.size()
+        return self.mask.bit_count()
 
     def min(self) -> int:
         """
-        Gets the minimum of the domain
+        Gets the minimum of the domain (position of the lowest set bit,
+        isolated by `mask & -mask`)
 
         Returns:
             The minimum value in the domain.
         """
-        return min(self.values)
+        mask = self.mask
+        if not mask:
+            raise ValueError("min() of an empty domain")
+        return (mask & -mask).bit_length() - 1 + self.offset
     
     def max(self) -> int:
         """
@@ -66,9 +131,11 @@ class Domain:
         Returns:
             The maximum value in the domain.
         """
-        return max(self.values)
+        if not self.mask:
+            raise ValueError("max() of an empty domain")
+        return self.mask.bit_length() - 1 + self.offset
 
-    def remove(self, v: int) -> bool:
+    def remove(self, v: int) -> int:
         """
         Removes value v from the domain
 
@@ -76,28 +143,86 @@ class Domain:
             v: The value to remove.
 
         Returns:
-            True if the value was present in the domain, False otherwise.
+            PROP_CHANGED if the value was removed, PROP_UNCHANGED if it was not
+            in the domain and PROP_FAIL (domain left untouched) if it was the
+            last value.
+        """
+        mask = self.mask
+        i = v - self.offset
+        if i < 0 or not (mask >> i) & 1:
+            return PROP_UNCHANGED
+        if mask == 1 << i:
+            return PROP_FAIL
+        if self.trail is not None:
+            self.trail.append((self, mask))
+            self.dirty.append(self.idx)
+        self.mask = mask ^ 1 << i
+        return PROP_CHANGED
+
+    def remove_mask(self, bits: int) -> int:
+        """
+        Removes at once all the values whose bit is set in `bits`
+
+        Args:
+            bits: The bitmask of the values to remove, with the offset of
+                the domain (bit i stands for the value offset + i).
+
+        Returns:
+            PROP_CHANGED if at least one value was removed, PROP_UNCHANGED if
+            none was in the domain and PROP_FAIL (domain left untouched) if
+            no value would be left.
+        """
+        old = self.mask
+        mask = old & ~bits
+        if mask == old:
+            return PROP_UNCHANGED
+        if not mask:
+            return PROP_FAIL
+        if self.trail is not None:
+            self.trail.append((self, old))
+            self.dirty.append(self.idx)
+        self.mask = mask
+        return PROP_CHANGED
+
+    def remove_above(self, v: int) -> int:
+        """
+        Removes all the values greater than v from the domain
+
+        Args:
+            v: The largest value to keep.
+
+        Returns:
+            PROP_CHANGED if at least one value was removed, PROP_UNCHANGED if
+            none was greater than v and PROP_FAIL (domain left untouched) if
+            no value would be left.
         """
-        if v in self.values:
-            self.values.remove(v)
-            if not self.values:
-                raise Inconsistency
-            return True
-        return False
+        i = v - self.offset
+        if i < 0:
+            return PROP_FAIL if self.mask else PROP_UNCHANGED
+        return self.remove_mask(~((1 << (i + 1)) - 1))
 
-    def fix(self, v: int):
+    def fix(self, v: int) -> int:
         """
         Fixes the domain to value v
 
         Args:
             v: The value to fix the domain to.
 
-        Raises:
-            Inconsistency: If the value is not in the domain.
-        """
-        if v not in self.values:
-            raise Inconsistency
-        self.values = {v}
+        Returns:
+            PROP_CHANGED if the domain changed, PROP_UNCHANGED if it was
+            already {v} and PROP_FAIL if the value is not in the domain.
+        """
+        i = v - self.offset
+        if i < 0 or not (self.mask >> i) & 1:
+            return PROP_FAIL
+        bit = 1 << i
+        if self.mask == bit:
+            return PROP_UNCHANGED
+        if self.trail is not None:
+            self.trail.append((self, self.mask))
+            self.dirty.append(self.idx)
+        self.mask = bit
+        return PROP_CHANGED
 
     def clone(self) -> "Domain":
         """
@@ -106,10 +231,13 @@ class Domain:
         Returns:
             A new Domain object with the same values.
         """
-        return Domain(self.values)
+        clone = Domain(0)
+        clone.mask = self.mask
+        clone.offset = self.offset
+        return clone
 
     def __repr__(self) -> str:
         return f"Domain({self.values})"
     
     def __str__(self) -> str:
-        return f"{self.values}"
\ No newline at end of file
+        return f"{self.values}"
@@ -2,12 +2,18 @@ from typing import override
 
 from .constraint import Constraint  # Assuming constraint.py is in the same directory
 from .variable import Variable  # Assuming variable.py is in the same directory
+from .status import PROP_UNCHANGED
 
 class NotEqual(Constraint):
     """
     Constraint representing x != y + offset.
     """
 
+    __slots__ = ('x', 'y', 'offset', 'vars', 'queued', 'dx', 'dy', 'x_shift', 'y_shift')
+
+    # a single call removes all the values it can
+    idempotent = True
+
     def __init__(self, x: Variable, y: Variable, offset: int = 0) -> None:
         """
         Initializes the NotEqual constraint (x != y + offset).
@@ -20,20 +26,37 @@ class NotEqual(Constraint):
         self.x = x
         self.y = y
         self.offset = offset
+        self.vars = (x, y)
+        self.queued = False
+        # domains are restored in place on backtrack, so they can be bound
+        # once here instead of being looked up on every propagation
+        self.dx = x.dom
+        self.dy = y.dom
+        # the value v of a fixed domain is mask.bit_length() - 1 plus the
+        # offset of the domain: removing v - offset from y (resp. v + offset
+        # from x) only takes one subtraction
+        self.x_shift = 1 + offset - self.dx.offset
+        self.y_shift = 1 - offset - self.dy.offset
 
     @override
-    def propagate(self) -> bool:
+    def propagate(self) -> int:
         """
         Propagates the NotEqual constraint.
 
         Returns:
-            True if any value was removed from a domain, False otherwise.
+            PROP_CHANGED if any value was removed from a domain, PROP_FAIL if
+            a domain would become empty, PROP_UNCHANGED otherwise.
         """
-        if self.x.dom.is_fixed():
-            return self.y.dom.remove(self.x.dom.min() - self.offset)
-        elif self.y.dom.is_fixed():
-            return self.x.dom.remove(self.y.dom.min() + self.offset)
-        return False
+        # a domain is fixed when its bitmask has exactly one bit set, whose
+        # position is the value
+        dx, dy = self.dx, self.dy
+        mx = dx.mask
+        if mx and not mx & (mx - 1):
+            return dy.remove(mx.bit_length() - self.x_shift)
+        my = dy.mask
+        if my and not my & (my - 1):
+            return dx.remove(my.bit_length() - self.y_shift)
+        return PROP_UNCHANGED
 
     def __repr__(self) -> str:
         return f'NotEqual(x={self.x}, y={self.y}, offset={self.offset})'
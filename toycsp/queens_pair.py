@@ -0,0 +1,74 @@
+from typing import override
+
+from .constraint import Constraint
+from .variable import Variable
+from .status import PROP_UNCHANGED
+
+class QueensPair(Constraint):
+    """
+    Constraint between the rows x and y of two queens placed d columns apart:
+    they are neither on the same row nor on the same diagonal, that is
+    x != y, x != y + d and x != y - d.
+
+    Same filtering as the three NotEqual(x, y, 0), NotEqual(x, y, d) and
+    NotEqual(x, y, -d), in a single constraint.
+    """
+
+    __slots__ = ('x', 'y', 'd', 'vars', 'queued', 'dx', 'dy', 'x_to_y', 'y_to_x')
+
+    # a single call removes all the values it can
+    idempotent = True
+
+    def __init__(self, x: Variable, y: Variable, d: int) -> None:
+        """
+        Initializes the QueensPair constraint.
+
+        Args:
+            x: The row of the first queen.
+            y: The row of the second queen.
+            d: The distance between the columns of the two queens.
+        """
+        self.x = x
+        self.y = y
+        self.d = d
+        self.vars = (x, y)
+        self.queued = False
+        self.dx = x.dom
+        self.dy = y.dom
+        # the attacked rows are built d bits higher so that none is lost,
+        # then moved into the bits of the other domain (the offsets of the
+        # domains may differ)
+        self.x_to_y = self.dx.offset - self.dy.offset - d
+        self.y_to_x = self.dy.offset - self.dx.offset - d
+
+    @override
+    def propagate(self) -> int:
+        """
+        Propagates the QueensPair constraint: once a queen is fixed, removes
+        its row and its two diagonals from the domain of the other one.
+
+        Returns:
+            PROP_CHANGED if any value was removed from a domain, PROP_FAIL if
+            a domain would become empty, PROP_UNCHANGED otherwise.
+        """
+        d = self.d
+        mx = self.dx.mask
+        if mx and not mx & (mx - 1):
+            # shifting the single bit of the fixed queen gives the attacked rows
+            m = mx << d
+            m |= m << d | m >> d
+            k = self.x_to_y
+            return self.dy.remove_mask(m << k if k >= 0 else m >> -k)
+        my = self.dy.mask
+        if my and not my & (my - 1):
+            m = my << d
+            m |= m << d | m >> d
+            k = self.y_to_x
+            return self.dx.remove_mask(m << k if k >= 0 else m >> -k)
+        return PROP_UNCHANGED
+
+    def __repr__(self) -> str:
+        return f'QueensPair(x={self.x}, y={self.y}, d={self.d})'
+
+    def __str__(self) -> str:
+        return f'{self.x.name} !~ {self.y.name} ({self.d} apart)'
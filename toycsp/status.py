@@ -0,0 +1,5 @@
+# Outcome of a domain change or of a propagation. Returned instead of raising
+# Inconsistency, since a dead end is met at most nodes of the search.
+PROP_UNCHANGED = 0  # nothing was removed
+PROP_CHANGED = 1    # at least one value was removed
+PROP_FAIL = 2       # a domain would become empty
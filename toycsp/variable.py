@@ -4,16 +4,35 @@ from .domain import Domain
 
 class Variable:
 
-    var_counter = 0
-    
+    __slots__ = ('dom', 'idx', '_name')
+
     def __init__(self, dom: Iterable[int], name: str | None = None) -> None:
-        self.dom = Domain(set(dom))
-        self.name = name or 'Var' + str(Variable.var_counter)
-        Variable.var_counter += 1
+        if isinstance(dom, range) and dom.step == 1:
+            self.dom = Domain.from_range(dom.start, dom.stop)
+        else:
+            self.dom = Domain(set(dom))
+        # index in `ToyCSP.variables`, set by `ToyCSP.add_variable`
+        self.idx: int = -1
+        self._name = name
         
+    @property
+    def name(self) -> str:
+        # the default name is only built when someone asks for it
+        if self._name:
+            return self._name
+        # not added to a CSP yet: no index to number it with
+        return f'Var{self.idx}' if self.idx >= 0 else 'Var?'
+
+    @name.setter
+    def name(self, name: str | None) -> None:
+        self._name = name
+
     def value(self) -> int | None:
-        if self.dom.is_fixed():
-            return self.dom.min()
+        # a fixed domain has a single bit set: its value is the bit position
+        # plus the offset of the domain
+        mask = self.dom.mask
+        if mask and not mask & (mask - 1):
+            return mask.bit_length() - 1 + self.dom.offset
         else:
             return None
         
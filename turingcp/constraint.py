@@ -1,5 +1,4 @@
 from cp_types import Constraint
-from state_types import State
 from cp_types import CPSolver
 from cp_types import IntVar
 from util_types import Procedure
@@ -14,12 +13,13 @@ class AbstractConstraint(Constraint):
 
     """
 
+    __slots__ = ('_solver', '_cid')
+
     def __init__(self, solver: CPSolver):
         self._solver: CPSolver = solver
-        self._scheduled = False
-        self._active: State[bool] = self._solver.get_state_manager().make_state_obj(
-            True
-        )
+        # id of the constraint in the solver, indexes its scheduled and
+        # active flags
+        self._cid: int = solver.register_constraint(self)
 
     def get_solver(self) -> CPSolver:
         "Returns the underlying solver"
@@ -30,27 +30,27 @@ class AbstractConstraint(Constraint):
         Sets the scheduled status of a constraint to avoid rescheduling
         propagation for a constraint already present in the propagation queue
         """
-        self._scheduled = scheduled
+        self._solver._scheduled[self._cid] = scheduled
 
     def is_scheduled(self) -> bool:
         """
         Returns `True` if the constraint is already scheduled in the propagation
         queue and `False` otherwise.
         """
-        return self._scheduled
+        return bool(self._solver._scheduled[self._cid])
 
     def set_active(self, active: bool) -> None:
         """
         Sets the activation status of the constraint. An inactive constraint
         won't be scheduled into the propagation queue.
         """
-        self._active.set_value(active)
+        self._solver.set_active(self._cid, active)
 
     def is_active(self) -> bool:
         """
         Returns `True` if the constraint is active and `False` otherwise.
         """
-        return self._active.value()
+        return bool(self._solver._active[self._cid])
 
     def post(self) -> None:
         """
@@ -67,6 +67,8 @@ class AbstractConstraint(Constraint):
 
 class FuncConstraint(AbstractConstraint):
 
+    __slots__ = ('filtering',)
+
     def __init__(self, solver: CPSolver, filtering: Procedure) -> None:
         super().__init__(solver)
         self.filtering = filtering
@@ -82,19 +84,23 @@ class NotEqual(AbstractConstraint):
     """
 
     Represents the constraint x != y + offset, where x and y are two constraints
-    and offset is an integer constant.
+    and offset is an integer constant. y can also be an integer constant.
 
     """
 
-    def __init__(self, x: IntVar, y: IntVar, offset: int = 0) -> None:
+    __slots__ = ('_x', '_y', '_offset')
+
+    def __init__(self, x: IntVar, y: IntVar | int, offset: int = 0) -> None:
         super().__init__(x.get_solver())
         self._x: IntVar = x
-        self._y: IntVar = y
+        self._y: IntVar | int = y
         self._offset: int = offset
 
     def post(self) -> None:
         x, y = self._x, self._y
-        if y.is_fixed():
+        if isinstance(y, int):
+            x.remove(y + self._offset)
+        elif y.is_fixed():
             x.remove(y.min() + self._offset)
         elif x.is_fixed():
             y.remove(x.min() - self._offset)
@@ -119,12 +125,38 @@ class NotEqual(AbstractConstraint):
         return f"NotEqual(x={self._x}, y={self._y})"
 
 
+class _EqualCallback:
+    """
+    Domain change listener of ``Equal`` on ``from_var``, which filters
+    ``to_var``
+    """
+
+    __slots__ = ('constraint', 'from_var', 'to_var', 'values')
+
+    def __init__(self, constraint: "Equal", from_var: IntVar, to_var: IntVar, values: list[int]) -> None:
+        self.constraint = constraint
+        self.from_var = from_var
+        self.to_var = to_var
+        self.values = values
+
+    def __call__(self) -> None:
+        self.constraint._handle_domain_change(self.from_var, self.to_var, self.values)
+
+
 class Equal(AbstractConstraint):
+    """
+
+    Represents the constraint x == y, where y is a variable or an integer
+    constant.
 
-    def __init__(self, x: IntVar, y: IntVar) -> None:
+    """
+
+    __slots__ = ('_x', '_y')
+
+    def __init__(self, x: IntVar, y: IntVar | int) -> None:
         super().__init__(x.get_solver())
         self._x: IntVar = x
-        self._y: IntVar = y
+        self._y: IntVar | int = y
 
     def _handle_domain_change(self, v1: IntVar, v2: IntVar, values: list[int]) -> None:
         self._bounds_intersect()
@@ -153,25 +185,20 @@ class Equal(AbstractConstraint):
 
     def post(self) -> None:
         x, y = self._x, self._y
-        if y.is_fixed():
+        if isinstance(y, int):
+            x.fix(y)
+        elif y.is_fixed():
             x.fix(y.min())
         elif x.is_fixed():
             y.fix(x.min())
         else:
             self._bounds_intersect()
+            # scratch buffer for the values of a domain
             values: list[int] = [0] * max(len(x), len(y))
             self._prune_equals(y, x, values)
             self._prune_equals(x, y, values)
-            x.when_domain_change(
-                lambda: (lambda _values: self._handle_domain_change(x, y, _values))(
-                    values
-                )
-            )
-            y.when_domain_change(
-                lambda: (lambda _values: self._handle_domain_change(y, x, _values))(
-                    values
-                )
-            )
+            x.when_domain_change(_EqualCallback(self, x, y, values))
+            y.when_domain_change(_EqualCallback(self, y, x, values))
 
     def propagate(self) -> None:
         ...
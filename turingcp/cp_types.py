@@ -1,13 +1,16 @@
 from abc import ABC, abstractmethod
 from typing import Protocol
 from collections import namedtuple
+from collections.abc import MutableSequence
 
-from util_types import Procedure
+from util_types import Procedure, Supplier
 from state_types import StateManager
 
 
 class Constraint(ABC):
 
+    __slots__ = ()
+
     @abstractmethod
     def post(self) -> None: ...
 
@@ -33,6 +36,8 @@ class Constraint(ABC):
 
 class IntVar(ABC):
 
+    __slots__ = ()
+
     @abstractmethod
     def get_solver(self) -> 'CPSolver': ...
     
@@ -87,6 +92,8 @@ class IntVar(ABC):
 
 class BoolVar(IntVar):
 
+    __slots__ = ()
+
     @abstractmethod
     def is_true(self) -> bool: ...
 
@@ -97,10 +104,27 @@ class BoolVar(IntVar):
     def fix(b: bool) -> None: ...
 
 
+# A binary decision (var, v): the left child posts var == v and the right
+# child var != v, without building a closure for each of them
+type Decision = tuple[IntVar, int]
+
+# A branching strategy returns the procedures of the child nodes (an empty
+# list when all the variables are fixed) or a binary Decision. The search
+# tells them apart by type, so the procedures must be returned in a list:
+# a tuple of procedures would be taken for a Decision.
+type BranchingStrategy = Supplier[list[Procedure] | Decision]
+
+
 class CPSolver(ABC):
     @abstractmethod
     def post(self, c: Constraint | BoolVar, enforce_fix_point: bool = True) -> None: ...
 
+    @abstractmethod
+    def register_constraint(self, c: Constraint) -> int: ...
+
+    @abstractmethod
+    def set_active(self, cid: int, active: bool) -> None: ...
+
     @abstractmethod
     def schedule(self, c: Constraint) -> None: ...
 
@@ -131,9 +155,14 @@ DomainListener = namedtuple(
     "DomainListener", ["change", "change_max", "change_min", "fix", "empty"]
 )
 
+# kinds of domain changes, combined in flags to notify a DomainListener
+CHANGE, CHANGE_MIN, CHANGE_MAX, FIX, EMPTY = 1, 2, 4, 8, 16
+
 
 class IntDomain(ABC):
 
+    __slots__ = ()
+
     @abstractmethod
     def min(self) -> int: ...
 
@@ -161,5 +190,8 @@ class IntDomain(ABC):
     @abstractmethod
     def remove_above(self, v: int, listener: DomainListener) -> None: ...
 
+    @abstractmethod
+    def fill_list(self, dest: MutableSequence[int]) -> int: ...
+
     @abstractmethod
     def __repr__(self) -> str: ...
@@ -1,10 +1,29 @@
 from abc import ABC, abstractmethod
-from collections.abc import Iterable
+from collections.abc import Iterable, MutableSequence
 
 from state_sparse_set import StateSparseSet
+from state_bit_set import StateBitSet, MAX_BIT_SET_RANGE
 from state import StateManager, CopyStateManager
 
 from cp_types import IntDomain, DomainListener
+from cp_types import CHANGE, CHANGE_MIN, CHANGE_MAX, FIX, EMPTY
+
+
+def _notify(listener: DomainListener, flags: int) -> None:
+    """
+    Calls the listener methods of the changes in ``flags``, always in the
+    same order
+    """
+    if flags & EMPTY:
+        listener.empty()
+    if flags & CHANGE:
+        listener.change()
+    if flags & CHANGE_MIN:
+        listener.change_min()
+    if flags & CHANGE_MAX:
+        listener.change_max()
+    if flags & FIX:
+        listener.fix()
 
 
 class SparseSetDomain(IntDomain):
@@ -34,9 +53,9 @@ class SparseSetDomain(IntDomain):
     SparseSetDomain([6, 8, 9])
     >>> sm.save_state()
     >>> d.remove_below(9, listener)
-    fixed
-    min changed
     changed
+    min changed
+    fixed
     >>> d
     SparseSetDomain([9])
     >>> d.remove(9, listener)
@@ -51,9 +70,9 @@ class SparseSetDomain(IntDomain):
     SparseSetDomain([6, 8, 9])
     >>> sm.save_state()
     >>> d.remove_above(6, listener)
-    fixed
-    min changed
     changed
+    max changed
+    fixed
     >>> d
     SparseSetDomain([6])
     >>> sm.restore_state()
@@ -61,8 +80,9 @@ class SparseSetDomain(IntDomain):
     >>> d
     SparseSetDomain([6, 8, 9])
     >>> d.remove_all_but(8, listener)
-    fixed
     changed
+    min changed
+    max changed
     fixed
     >>> d
     SparseSetDomain([8])
@@ -75,8 +95,15 @@ class SparseSetDomain(IntDomain):
     SparseSetDomain([6, 8, 9])
     """
 
+    __slots__ = ('domain',)
+
     def __init__(self, sm: StateManager, values: Iterable[int]):
-        self.domain: StateSparseSet = StateSparseSet(sm, values)
+        values = set(values)
+        # the values of small domains are kept in the bits of a single int
+        if values and max(values) - min(values) < MAX_BIT_SET_RANGE:
+            self.domain: StateSparseSet | StateBitSet = StateBitSet(sm, values)
+        else:
+            self.domain = StateSparseSet(sm, values)
 
     def min(self) -> int:
         return self.domain.min()
@@ -94,64 +121,57 @@ class SparseSetDomain(IntDomain):
         return len(self.domain) == 1
 
     def remove(self, v: int, listener: DomainListener) -> None:
-        if v in self.domain:
-            max_changed: bool = self.max() == v
-            min_changed: bool = self.min() == v
-            self.domain.remove(v)
-            if len(self.domain) == 0:
-                listener.empty()
-            listener.change()
-            if min_changed:
-                listener.change_min()
-            if max_changed:
-                listener.change_max()
-            if len(self.domain) == 1:
-                listener.fix()
+        flags: int = self.domain.remove_flags(v)
+        if flags:
+            _notify(listener, flags)
 
     def remove_all_but(self, v: int, listener: DomainListener) -> None:
-        if v in self.domain:
-            if len(self.domain) > 1:
-                max_changed: bool = self.max() == v
-                min_changed: bool = self.min() == v
-                self.domain.remove_all_but(v)
-                if len(self.domain) == 0:
-                    listener.empty()
-                listener.fix()
-                listener.change()
-
-                if min_changed:
-                    listener.change_min()
-                if max_changed:
-                    listener.change_max()
-                if len(self.domain) == 1:
-                    listener.fix()
+        domain: StateSparseSet | StateBitSet = self.domain
+        if v in domain:
+            if len(domain) > 1:
+                flags: int = CHANGE | FIX
+                if v != domain.min():
+                    flags |= CHANGE_MIN
+                if v != domain.max():
+                    flags |= CHANGE_MAX
+                domain.remove_all_but(v)
+                _notify(listener, flags)
         else:
-            self.domain.remove_all()
-            listener.empty()
+            domain.remove_all()
+            _notify(listener, EMPTY)
 
     def remove_below(self, v: int, listener: DomainListener) -> None:
-        if v > self.domain.min():
-            self.domain.remove_below(v)
-            if len(self.domain) == 0:
-                listener.empty()
+        domain: StateSparseSet | StateBitSet = self.domain
+        if v > domain.min():
+            size: int = domain.remove_below(v)
+            if size == 0:
+                _notify(listener, EMPTY)
             else:
-                if len(self.domain) == 1:
-                    listener.fix()
-
-                listener.change_min()
-                listener.change()
+                _notify(listener, CHANGE | CHANGE_MIN | (FIX if size == 1 else 0))
 
     def remove_above(self, v: int, listener: DomainListener) -> None:
-        if v < self.domain.max():
-            self.domain.remove_above(v)
-            if len(self.domain) == 0:
-                listener.empty()
+        domain: StateSparseSet | StateBitSet = self.domain
+        if v < domain.max():
+            size: int = domain.remove_above(v)
+            if size == 0:
+                _notify(listener, EMPTY)
             else:
-                if len(self.domain) == 1:
-                    listener.fix()
-
-                listener.change_min()
-                listener.change()
+                _notify(listener, CHANGE | CHANGE_MAX | (FIX if size == 1 else 0))
+
+    def fill_list(self, dest: MutableSequence[int]) -> int:
+        """
+        Copies the values of the domain, in no particular order, at the
+        start of ``dest`` and returns their number
+
+        >>> sm = CopyStateManager()
+        >>> d = SparseSetDomain(sm, [3, 5, 7, 100])
+        >>> dest = [0] * 5
+        >>> d.fill_list(dest)
+        4
+        >>> sorted(dest[:4])
+        [3, 5, 7, 100]
+        """
+        return self.domain.fill_list(dest)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.domain.to_list()})"
@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Iterator
 from typing import TypeVar, Generic
 
 T = TypeVar('T')
@@ -53,7 +55,9 @@ class QueueOverflowError(QueueException):
 class LinkedQueue(QueueADT, Generic[T]):
     '''
 
-    FIFO queue implementation using a singly linked list for storage.
+    FIFO queue implementation using a ``collections.deque`` for storage: a
+    linked list of blocks of items, so that enqueue and dequeue allocate no
+    node per item.
 
     >>> q = LinkedQueue(items=[3, 4, 5])
     >>> q
@@ -122,99 +126,44 @@ class LinkedQueue(QueueADT, Generic[T]):
     '''
 
 
-    #-------------------------- nested Node class --------------------------
-    class _Node(Generic[T]):
-        '''Lightweight, nonpublic class for storing a singly linked node.'''
-
-        __slots__ = '_element' , '_next' # streamline memory usage
-
-        def __init__(self, element: T, next: '_Node') -> None:
-            self._element = element
-            self._next = next
-
-        def __repr__(self) -> str:
-            return f'_Node(element={self._element}, next={self._next})'
-
-    #------------------------------- stack methods -------------------------------
+    #------------------------------- queue methods -------------------------------
     def __init__(self, items: list[T] | None = None) -> None:
         self.from_list(items or [])
 
     def __len__(self) -> int:
-        return self._size
+        return len(self._items)
 
     def is_empty(self) -> bool:
-        return self._size == 0
+        return not self._items
 
     def first(self) -> T:
-        if self.is_empty():
+        if not self._items:
             raise EmptyQueueError("Cannot get first element from empty queue")
 
-        return self._head._element
+        return self._items[0]
 
     def enqueue(self, item: T) -> None:
-        new_node = self._Node(item, None)
-
-        if self.is_empty():
-            self._head = new_node
-        else:
-            self._tail._next = new_node
-
-        self._tail = new_node
-        self._size += 1
+        self._items.append(item)
 
     def dequeue(self) -> T:
-        if self.is_empty():
+        if not self._items:
             raise EmptyQueueError("Cannot dequeue from empty queue")
 
-        node = self._head
-
-        second_node = node._next
-        self._head = second_node
-
-        if self._size == 1:
-            self._tail = None
-
-        self._size -= 1
-
-        return node._element
+        return self._items.popleft()
 
     def to_list(self) -> list[T]:
-        result = [None] * self._size
-        current_node = self._head
-
-        for i in range(self._size):
-            result[i] = current_node._element
-            current_node = current_node._next
-
-        return result
-
-    def _reset(self) -> None:
-        self._head = None # reference to the head node
-        self._tail = None # reference to the tail node
-        self._size = 0 # number of queue elements
-
+        return list(self._items)
 
     def from_list(self, items: list[T]) -> None:
-        self._reset()
-        for item in items:
-            self.enqueue(item)
+        self._items: deque[T] = deque(items)
 
 
     def __repr__(self) -> str:
         return f'LinkedQueue(items={self.to_list()})'
 
 
-    def __iter__(self):
-        self._cursor = self._head
-        return self
-    
-    def __next__(self):
-        if self._cursor is not None:
-            item: T = self._cursor._element
-            self._cursor = self._cursor._next
-            return item
-
-        raise StopIteration
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._items)
 
 if __name__ == '__main__':
     import doctest
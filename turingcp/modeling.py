@@ -4,8 +4,7 @@ from solver import TuringCP
 from state import CopyStateManager
 
 from state_types import StateManager
-from cp_types import CPSolver, IntVar, Constraint
-from util_types import Supplier, Procedure
+from cp_types import CPSolver, IntVar, Constraint, BranchingStrategy
 
 from variable import IntVarImpl
 from search import DFSearch
@@ -26,7 +25,7 @@ def post(c: Constraint) -> None:
     solver.post(c)
 
 
-def make_search(branching: Supplier[list[Procedure]] | None = None) -> DFSearch:
+def make_search(branching: BranchingStrategy | None = None) -> DFSearch:
     return DFSearch(solver, branching)
 
 
@@ -2,19 +2,15 @@ import collections.abc
 from typing import Any
 
 
-from state_types import StateManager
-from util_types import Predicate, Supplier, Procedure
-from cp_types import CPSolver
+from state_types import StateManager, StateInt
+from util_types import Predicate, Procedure
+from cp_types import CPSolver, Decision, BranchingStrategy
 
 from state import NewState
 
 from utils import StopSearchException
 from utils import InconsistencyException
 from constraint import NotEqual, Equal
-from variable import IntVarImpl
-
-
-type BranchingStrategy = Supplier[list[Procedure]]
 
 
 class SearchStatistics:
@@ -76,26 +72,28 @@ class DFSearch:
 
         # collects all handlers (args beginning with `on_`)
         self.handlers = {}
+        self._bind_handlers()
 
     def default_branching(self) -> BranchingStrategy:
-        def strategy():
-            def left():
-                self.solver.post(Equal(var, IntVarImpl(self.solver, {v})))
-
-            def right():
-                self.solver.post(NotEqual(var, IntVarImpl(self.solver, {v})))
+        vars = self.solver.vars
+        # index of the first variable that may not be fixed: the variables
+        # before it stay fixed in the whole subtree, and the index is restored
+        # with the rest of the state on backtrack
+        next_unfixed: StateInt = self.sm.make_state_int(0)
 
+        def strategy():
             # next variable choice
-            for var in self.solver.vars:
-                if not var.is_fixed():
-                    break
-            else:
+            i: int = next_unfixed.value()
+            items, n = vars.snapshot()
+            while i < n and items[i].is_fixed():
+                i += 1
+            if i == n:
                 return []
+            next_unfixed.set_value(i)
+            var = items[i]
 
             # next value choice
-            v: int = var.min()
-
-            return [left, right]
+            return (var, var.min())
         return strategy
     
 
@@ -111,11 +109,6 @@ class DFSearch:
                 stats.set_completed()
             except StopSearchException as ignored:
                 ...
-            except RecursionError as e:
-                print(
-                    "Try increasing the recursion limit with `sys.setrecursionlimit(limit)`"
-                )
-                print("or ... implement DFS using an explicit stack")
 
         return stats
 
@@ -126,48 +119,90 @@ class DFSearch:
         parent_id: int,
         position: int,
     ) -> None:
-        if limit(stats):
-            raise StopSearchException
-
-        branches: list[Procedure] = self.branching()
-        self.cur_node_id += 1
-        node_id: int = self.cur_node_id
-
-        if len(branches) == 0:
-            stats.incr_solutions()
-            self.call_handlers(
-                "solution",
-                {"parent_id": parent_id, "node_id": node_id, "position": position},
-            )
-        else:
-            self.call_handlers(
-                "branch",
-                {
-                    "parent_id": parent_id,
-                    "node_id": node_id,
-                    "position": position,
-                    "n_childs": len(branches),
-                },
-            )
-            pos: int = 0
-            for branch in branches:
-                with NewState(self.sm):
-                    try:
-                        stats.incr_nodes()
-                        branch()
-                        self.dfs(stats, limit, node_id, pos)
-                    except InconsistencyException as e:
-                        self.cur_node_id += 1
-                        stats.incr_failures()
+        # Iterative DFS: each open node is a frame on an explicit stack
+        # [branches, next branch, node_id, parent_id, position, level], where
+        # level is the state manager level to restore before each branch
+        sm: StateManager = self.sm
+        base_level: int = sm.get_level()
+        stack: list[list[Any]] = []
+        expand: bool = True
+
+        try:
+            while True:
+                if expand:
+                    expand = False
+                    if limit(stats):
+                        raise StopSearchException
+
+                    branches: list[Procedure] | Decision = self.branching()
+                    self.cur_node_id += 1
+                    node_id: int = self.cur_node_id
+
+                    if len(branches) == 0:
+                        stats.incr_solutions()
+                        self.call_handlers(
+                            "solution",
+                            {"parent_id": parent_id, "node_id": node_id, "position": position},
+                        )
+                    else:
+                        if self._h_branch:
+                            self.call_handlers(
+                                "branch",
+                                {
+                                    "parent_id": parent_id,
+                                    "node_id": node_id,
+                                    "position": position,
+                                    "n_childs": len(branches),
+                                },
+                            )
+                        stack.append([branches, 0, node_id, parent_id, position, sm.get_level()])
+
+                if not stack:
+                    return
+
+                frame = stack[-1]
+                branches, pos, node_id, frame_parent_id, frame_position, level = frame
+                # undo the previous branch of this node
+                sm.restore_state_until(level)
+                if pos == len(branches):
+                    stack.pop()
+                    continue
+                frame[1] = pos + 1
+
+                sm.save_state()
+                try:
+                    stats.incr_nodes()
+                    # a Decision, the procedures of the children come in a list
+                    if type(branches) is tuple:
+                        var, v = branches
+                        if pos == 0:
+                            self.solver.post(Equal(var, v))
+                        else:
+                            self.solver.post(NotEqual(var, v))
+                    else:
+                        branches[pos]()
+                except InconsistencyException as e:
+                    # the traceback refers to the frames of the failed branch
+                    # and their domains: don't keep them alive
+                    e.with_traceback(None)
+                    self.cur_node_id += 1
+                    stats.incr_failures()
+                    if self._h_failure:
                         self.call_handlers(
                             "failure",
                             {
-                                "parent_id": parent_id,
+                                "parent_id": frame_parent_id,
                                 "node_id": node_id,
-                                "position": position,
+                                "position": frame_position,
                             },
                         )
-                pos += 1
+                    continue
+
+                # descend into the child
+                parent_id, position = node_id, pos
+                expand = True
+        finally:
+            sm.restore_state_until(base_level)
 
     ############ Event handler registration and management
     def register_handler(self, event, handler) -> None:
@@ -175,6 +210,13 @@ class DFSearch:
             self.handlers[event].append(handler)
         else:
             self.handlers[event] = [handler]
+        self._bind_handlers()
+
+    def _bind_handlers(self) -> None:
+        # handlers of the events raised at each node, None when there are
+        # none: the search then skips building their infos dict
+        self._h_branch = self.handlers.get("branch") or None
+        self._h_failure = self.handlers.get("failure") or None
 
     def call_handlers(self, event: str, infos: dict[str, Any]) -> None:
         if event in self.handlers:
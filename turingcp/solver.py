@@ -1,22 +1,33 @@
-from typing import Deque
-
-from collections import deque
+from array import array
 
 from cp_types import CPSolver, IntVar, BoolVar, Constraint
 
 from state import StateManager
 from util_types import Procedure
 from state_stack import StateStack
-from linked_queue import LinkedQueue
 
 from utils import InconsistencyException
 
+# scheduling states of a constraint. A constraint scheduled again while it
+# propagates is only put back in the queue once its propagation is over
+UNSCHEDULED, SCHEDULED, PROPAGATING, RESCHEDULED = 0, 1, 2, 3
+
 
 class TuringCP(CPSolver):
 
     def __init__(self, sm: StateManager) -> None:
-        self._propagation_queue: Deque[Constraint] = deque()
-        self._fix_point_listeners: LinkedQueue[Procedure] = LinkedQueue()
+        # constraints by id; the stack is restored on backtrack so that the
+        # ids of the constraints posted down a branch are reused
+        self._constraints: StateStack[Constraint] = StateStack(sm)
+        # scheduling state of each constraint, indexed by constraint id
+        self._scheduled: bytearray = bytearray(1024)
+        # active flag of each constraint, indexed by constraint id; its
+        # writes are undone by the state manager on backtrack
+        self._active: bytearray = bytearray(1024)
+        # propagation queue of constraint ids, consumed from _queue_head
+        self._queue: array = array('i')
+        self._queue_head: int = 0
+        self._fix_point_listeners: list[Procedure] = []
         self._sm = sm
         
         self.vars: StateStack[IntVar] = StateStack(sm)
@@ -24,16 +35,36 @@ class TuringCP(CPSolver):
     def add_variable(self, var: IntVar) -> None:
         self.vars.push(var)
 
+    def register_constraint(self, c: Constraint) -> int:
+        cid: int = len(self._constraints)
+        self._constraints.push(c)
+        if cid == len(self._scheduled):
+            self._scheduled.extend(bytes(cid))
+            self._active.extend(bytes(cid))
+        self._active[cid] = 1
+        return cid
+
+    def set_active(self, cid: int, active: bool) -> None:
+        active_bits: bytearray = self._active
+        if active_bits[cid] != active:
+            self._sm.register_undo(active_bits.__setitem__, cid, active_bits[cid])
+            active_bits[cid] = active
+
     def get_state_manager(self) -> StateManager:
         return self._sm
 
     def schedule(self, c: Constraint) -> None:
-        if c.is_active() and not c.is_scheduled():
-            c.set_scheduled(True)
-            self._propagation_queue.append(c)
+        cid: int = c._cid
+        state: int = self._scheduled[cid]
+        if state == UNSCHEDULED:
+            if self._active[cid]:
+                self._scheduled[cid] = SCHEDULED
+                self._queue.append(cid)
+        elif state == PROPAGATING:
+            self._scheduled[cid] = RESCHEDULED
 
     def on_fix_point(self, listener: Procedure) -> None:
-        self._fix_point_listeners.enqueue(listener)
+        self._fix_point_listeners.append(listener)
 
     def _notify_fix_point(self) -> None:
         for listener in self._fix_point_listeners:
@@ -48,21 +79,37 @@ class TuringCP(CPSolver):
         all the constraints.
 
         """
+        queue, scheduled, active = self._queue, self._scheduled, self._active
+        # the backing list of the constraint stack, indexed without bounds
+        # check: the ids in the queue are always below its size
+        constraints, _ = self._constraints.snapshot()
+        cid: int = -1
         try:
             self._notify_fix_point()
-            while len(self._propagation_queue) > 0:
-                self._propagate(self._propagation_queue.popleft())
-        except InconsistencyException as e:
-            # set all the constraints in propagation queue to unscheduled
-            while len(self._propagation_queue) > 0:
-                self._propagation_queue.popleft().set_scheduled(False)
-            raise e
-
-    def _propagate(self, c: Constraint) -> None:
-        # shouldn't this be part of the fix_point method ...
-        c.set_scheduled(False)
-        if c.is_active():
-            c.propagate()
+            # the head is kept on the solver since a constraint posted during
+            # propagation runs a nested fix point on the same queue
+            while self._queue_head < len(queue):
+                cid = queue[self._queue_head]
+                self._queue_head += 1
+                if active[cid]:
+                    scheduled[cid] = PROPAGATING
+                    constraints[cid].propagate()
+                    if scheduled[cid] == RESCHEDULED and active[cid]:
+                        scheduled[cid] = SCHEDULED
+                        queue.append(cid)
+                        continue
+                scheduled[cid] = UNSCHEDULED
+        except InconsistencyException:
+            # set the failed constraint and all the constraints in
+            # propagation queue to unscheduled
+            if cid >= 0:
+                scheduled[cid] = UNSCHEDULED
+            for cid in queue[self._queue_head:]:
+                scheduled[cid] = UNSCHEDULED
+            raise
+        finally:
+            del queue[:]
+            self._queue_head = 0
 
     def post(self, c: Constraint, enforce_fix_point: bool = True) -> None:
         c.post()
@@ -70,4 +117,5 @@ class TuringCP(CPSolver):
             self.fix_point()
 
     def __repr__(self) -> str:
-        return f'TuringCP(prop_q={repr(self._propagation_queue)})'
\ No newline at end of file
+        queue = [self._constraints[cid] for cid in self._queue[self._queue_head:]]
+        return f'TuringCP(prop_q={queue!r})'
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from collections.abc import Iterable
+from array import array
+from collections.abc import Iterable, Iterator
 
 # SparseSet implementation
 # Inspired by MiniCP SparseSets
@@ -18,7 +19,7 @@ class SparseSet:
     """
     >>> s = SparseSet(range(4, 8))
     >>> s._values
-    [0, 1, 2, 3]
+    array('i', [0, 1, 2, 3])
     >>> s
     SparseSet([4, 5, 6, 7])
     >>> len(s)
@@ -42,7 +43,9 @@ class SparseSet:
     >>> s
     SparseSet([2, 4, 6])
     >>> s._values
-    [0, 4, 2, 3, 1]
+    array('i', [0, 2, 4, 1, 3])
+    >>> s._indices
+    array('i', [0, 3, 1, 4, 2])
     >>> s._size
     3
     >>> s = SparseSet([])
@@ -73,25 +76,28 @@ class SparseSet:
     """
 
     def __init__(self, values: Iterable[int]) -> None:
-        if len(values) > 0:
-            a = min(values)
-            b = max(values)
-        else:
+        present = sorted(set(values))
+        if not present:
             raise ValueError("Set cannot be initialized with empty iterable")
 
-        self._size: int = b - a + 1
+        a = present[0]
+        span = present[-1] - a + 1
+
+        self._size: int = len(present)
 
         self._min = 0
-        self._max = b - a
+        self._max = span - 1
         self._offset: int = a
-        self._values: list[int] = list(range(0, b + 1 - a))
-        self._indices: list[int] = self._values[:]
 
-        # remove all the values that are not present in values
+        # present values first, then the missing ones of the range
+        present_mask = bytearray(span)
+        self._values: array = array('i', [v - a for v in present])
         for intern_value in self._values:
-            val = intern_value + self._offset
-            if val not in values:
-                self.remove(val)
+            present_mask[intern_value] = 1
+        self._values.extend(x for x in range(span) if not present_mask[x])
+        self._indices: array = array('i', bytes(self._values.itemsize * span))
+        for i, intern_value in enumerate(self._values):
+            self._indices[intern_value] = i
 
     def min(self) -> int:
         if self.is_empty():
@@ -130,7 +136,7 @@ class SparseSet:
         >>> s
         SparseSet([1, 3, 4])
         >>> s._values
-        [0, 3, 2, 1]
+        array('i', [0, 3, 2, 1])
         >>> s.remove(2)
         False
         >>> s.remove(1)
@@ -157,25 +163,41 @@ class SparseSet:
         SparseSet([3])
 
         """
-        if value not in self:
+        v: int = value - self._offset
+        min_v: int = self._min
+        max_v: int = self._max
+        if v < min_v or v > max_v:
+            return False
+        values, indices = self._values, self._indices
+        i: int = indices[v]
+        size: int = self._size
+        if i >= size:
             return False
 
-        intern_value = value - self._offset
-        s = len(self)
-        self._swap_positions(intern_value, self._values[s - 1])
-        self._size -= 1
-        self._update_min(intern_value)
-        self._update_max(intern_value)
+        # swap v with the last value of the set
+        size -= 1
+        last: int = values[size]
+        values[i] = last
+        values[size] = v
+        indices[last] = i
+        indices[v] = size
+        self._size = size
+
+        # the set is not empty: the new bound is reached before the other
+        # bound
+        if size > 0:
+            if v == min_v:
+                v += 1
+                while indices[v] >= size:
+                    v += 1
+                self._min = v
+            elif v == max_v:
+                v -= 1
+                while indices[v] >= size:
+                    v -= 1
+                self._max = v
         return True
 
-    def _swap_positions(self, v1: int, v2: int) -> None:
-        i1: int = self._indices[v1]
-        i2: int = self._indices[v2]
-        self._values[i1] = v2
-        self._values[i2] = v1
-        self._indices[v1] = i2
-        self._indices[v2] = i1
-
     def remove_all_but(self, value: int) -> None:
         """
         >>> s = SparseSet([1,2,3,4,5])
@@ -196,10 +218,14 @@ class SparseSet:
         if value not in self:
             raise NoSuchElementException("Value is not in set")
         _v: int = value - self._offset
-        index: int = self._indices[_v]
-        self._indices[_v] = 0
-        self._indices[self._values[0]] = index
-        self._values[index], self._values[0] = self._values[0], self._values[index]
+        values, indices = self._values, self._indices
+        # swap _v with the first value of the set
+        index: int = indices[_v]
+        first: int = values[0]
+        values[index] = first
+        values[0] = _v
+        indices[first] = index
+        indices[_v] = 0
         self._size = 1
         self._min = _v
         self._max = _v
@@ -215,69 +241,122 @@ class SparseSet:
         """
         self._size = 0
 
-    def remove_above(self, value: int) -> None:
+    def remove_above(self, value: int) -> int:
         """
+        Removes the values above `value` and returns the new size of the set.
+
         >>> s = SparseSet([3, 4, 5, 6, 7])
         >>> s.remove_above(5)
+        3
         >>> s
         SparseSet([3, 4, 5])
         >>> s = SparseSet([1, 3, 5, 6, 7])
         >>> s.remove_above(5)
+        3
         >>> s
         SparseSet([1, 3, 5])
+        >>> s.max()
+        5
+        >>> s.remove_above(8)
+        3
         >>> s.remove_above(0)
+        0
         >>> s
         SparseSet([])
         """
         if value < self.min():
             self.remove_all()
-        else:
-            v = self.max()
-            while v > value:
-                self.remove(v)
-                v -= 1
-
-    def remove_below(self, value: int) -> None:
+            return 0
+
+        stop: int = value - self._offset
+        size: int = self._size
+        if stop >= self._max:
+            return size
+
+        values, indices = self._values, self._indices
+        # same swaps as removing the values one by one from the max down
+        for v in range(self._max, stop, -1):
+            i: int = indices[v]
+            if i < size:
+                size -= 1
+                last: int = values[size]
+                values[i] = last
+                values[size] = v
+                indices[last] = i
+                indices[v] = size
+        self._size = size
+
+        # the min is still in the set, so the new max is found before it
+        v = stop
+        while indices[v] >= size:
+            v -= 1
+        self._max = v
+        return size
+
+    def remove_below(self, value: int) -> int:
         """
+        Removes the values below `value` and returns the new size of the set.
+
         >>> s = SparseSet([3, 4, 5, 6, 7])
         >>> s.remove_below(5)
+        3
         >>> s
         SparseSet([5, 6, 7])
         >>> s = SparseSet([1, 3, 5, 6, 7])
         >>> s.remove_below(5)
+        3
         >>> s
         SparseSet([5, 6, 7])
+        >>> s.min()
+        5
+        >>> s = SparseSet([1, 3, 5, 6, 7])
+        >>> s.remove_below(4)
+        3
+        >>> s
+        SparseSet([5, 6, 7])
+        >>> s.min()
+        5
+        >>> s.remove_below(2)
+        3
         >>> s.remove_below(10)
+        0
         >>> s
         SparseSet([])
         """
         if value > self.max():
             self.remove_all()
-        else:
-            v = self.min()
-            while v < value:
-                self.remove(v)
-                v += 1
-
-    def _update_min(self, intern_value: int) -> None:
-        if not self.is_empty() and intern_value == self._min:
-            val = self._min + 1
-            while not self._raw_contains(val):
-                val += 1
-            self._min = val
-
-    def _update_max(self, intern_value: int) -> None:
-        if not self.is_empty() and intern_value == self._max:
-            val = self._max - 1
-            while not self._raw_contains(val):
-                val -= 1
-            self._max = val
+            return 0
+
+        stop: int = value - self._offset
+        size: int = self._size
+        if stop <= self._min:
+            return size
+
+        values, indices = self._values, self._indices
+        # same swaps as removing the values one by one from the min up
+        for v in range(self._min, stop):
+            i: int = indices[v]
+            if i < size:
+                size -= 1
+                last: int = values[size]
+                values[i] = last
+                values[size] = v
+                indices[last] = i
+                indices[v] = size
+        self._size = size
+
+        # the max is still in the set, so the new min is found before it
+        v = stop
+        while indices[v] >= size:
+            v += 1
+        self._min = v
+        return size
 
     def _raw_contains(self, value: int) -> bool:
         """
         >>> s = SparseSet([1])
         >>> s._values
-        [0]
+        array('i', [0])
         >>> s._size
         1
         >>> s._min
@@ -288,7 +367,7 @@ class SparseSet:
         False
         >>> s._raw_contains(0)
         True
-        >>> s._size = 0
+        >>> s.remove_all()
         >>> s._raw_contains(0)
         False
         """
@@ -303,13 +382,38 @@ class SparseSet:
     def __contains__(self, value: int) -> bool:
         return self._raw_contains(value - self._offset)
 
+    def __iter__(self) -> Iterator[int]:
+        """
+        Iterates over the values of the set, in storage order (not sorted).
+
+        >>> s = SparseSet([1, 2, 3, 4])
+        >>> s.remove(2)
+        True
+        >>> list(s)
+        [1, 4, 3]
+        """
+        offset = self._offset
+        return (x + offset for x in self._values[: self._size])
+
+    def raw_iter(self) -> Iterator[int]:
+        """
+        Iterates over the internal values of the set (the values minus the
+        offset of the set), in storage order.
+
+        >>> s = SparseSet([3, 5, 6])
+        >>> list(s.raw_iter())
+        [0, 2, 3]
+        """
+        return iter(self._values[: self._size])
+
     def to_list(self) -> list[int]:
         """
         >>> s = SparseSet([1, 2, 3])
         >>> s.to_list()
         [1, 2, 3]
         """
-        return sorted([x + self._offset for x in self._values[: self._size]])
+        offset = self._offset
+        return sorted([x + offset for x in self._values[: self._size]])
 
     def to_set(self) -> set[int]:
         """
@@ -317,7 +421,7 @@ class SparseSet:
         >>> s.to_set() == {2, 4, 6}
         True
         """
-        return set(self.to_list())
+        return set(self)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.to_list()})"
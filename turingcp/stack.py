@@ -9,6 +9,8 @@ T = TypeVar('T')
 
 class StackADT(ABC, Generic[T]):
 
+    __slots__ = ()
+
     @abstractmethod
     def push(self, item: T) -> None:
         pass
@@ -73,11 +75,14 @@ class ListStack(StackADT[T], Generic[T]):
     >>> s: ListStack[int] = ListStack([1,2,3])
     >>> [item for item in s]
     [1, 2, 3]
+    >>> [(a, b) for a in s for b in s if a < b]
+    [(1, 2), (1, 3), (2, 3)]
     '''
 
+    __slots__ = ('_items',)
+
     def __init__(self, items: Iterable[T] | None = None) -> None:
         self._items = list(items) if items is not None else []
-        self._iter_position = 0
 
     def __repr__(self) -> str:
         return f'{self.__class__.__name__}({self._items})'
@@ -104,16 +109,7 @@ class ListStack(StackADT[T], Generic[T]):
         return len(self) == 0
     
     def __iter__(self):
-        self._iter_position = 0
-        return self
-    
-    def __next__(self):
-        if self._iter_position < len(self):
-            item: T = self._items[self._iter_position]
-            self._iter_position += 1
-            return item
-
-        raise StopIteration
+        return iter(self._items)
             
     
 
@@ -163,44 +159,41 @@ class Stack(StackADT[T], Generic[T]):
 
     '''
 
+    __slots__ = ('_items',)
+
     def __init__(self, items: Iterable[T] | None = None) -> None:
         self._items: list[T] = list(items) if items is not None else []
-        self._iter_position = 0
-
-        # initially _item size is the real size
-        self._real_size = len(self._items)
 
     def __repr__(self) -> str:
-        return f'{self.__class__.__name__}({self._items[:self._real_size]})'
+        return f'{self.__class__.__name__}({self._items})'
 
     def __len__(self) -> int:
-        return self._real_size
+        return len(self._items)
 
     def push(self, item: T) -> None:
-        if self._real_size < len(self._items):
-            self._items[self._real_size] = item
-        else:
-            self._items.append(item)
-        self._real_size += 1
+        self._items.append(item)
 
     def pop(self) -> T:
-        if self._real_size == 0:
-            raise EmptyStackError('Pop from an empty stack')
-
-        item = self._items[self._real_size - 1]
-        self._real_size -= 1
-        return item
+        try:
+            return self._items.pop()
+        except IndexError as e:
+            raise EmptyStackError('Pop from an empty stack') from e
 
     def peek(self) -> T:
-        if self._real_size == 0:
-            raise EmptyStackError('Peek an empty stack')
-        return self._items[self._real_size - 1]
+        try:
+            return self._items[-1]
+        except IndexError as e:
+            raise EmptyStackError('Peek an empty stack') from e
 
     def is_empty(self) -> bool:
         return len(self) == 0
 
     def resize(self, new_size: int) -> None:
         '''
+        Truncates the stack to its ``new_size`` bottom items. The dropped
+        items are discarded, so growing a stack with ``resize`` is not
+        supported and raises a ``StackException``.
+
         >>> s = Stack([1,2,3,4])
         >>> len(s)
         4
@@ -208,32 +201,18 @@ class Stack(StackADT[T], Generic[T]):
         >>> s
         Stack([1, 2])
         >>> s.resize(4)
-        >>> s
-        Stack([1, 2, 3, 4])
-        >>> s.resize(6)
         Traceback (most recent call last):
           ...
-        StackException: Cannot resize above underlying collection size
-        
+        StackException: Cannot resize above stack size
+
         '''
         if new_size <= len(self._items):
-            self._real_size = new_size
-            return 
+            del self._items[new_size:]
         else:
-            raise StackException("Cannot resize above underlying collection size")
-            
-    
-    def __iter__(self):
-        self._iter_position = 0
-        return self
-    
-    def __next__(self):
-        if self._iter_position < self._real_size:
-            item: T = self._items[self._iter_position]
-            self._iter_position += 1
-            return item
+            raise StackException("Cannot resize above stack size")
 
-        raise StopIteration
+    def __iter__(self):
+        return iter(self._items)
     
     
     
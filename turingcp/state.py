@@ -8,47 +8,162 @@ await get_module('turing-cp-2025', 'turingcp_stack', 'stack')
 ############################################################
 """
 
+from collections.abc import Callable
+
 from stack import Stack
 
 from util_types import Procedure
 from state_types import *
 
 
-class Copy[T](Storage, State[T]):
+class Copy[T](State[T]):
+    """
+    Handle on a value stored at index ``idx`` of a ``CopyColumn``
+    """
+
+    __slots__ = ('_column', '_values', '_idx', '_magic')
+
+    def __init__(self, column: "CopyColumn[T]", idx: int) -> None:
+        self._column = column
+        # the handle keeps the column buffer itself, which is only modified
+        # in place, to read the value with a single subscript
+        self._values = column.values
+        self._idx = idx
+        # the value is already logged in the trail if the column magic has
+        # not changed since the last write
+        self._magic = column.magic
+
+    def set_value(self, value: T) -> T:
+        column = self._column
+        if self._magic != column.magic:
+            # first write since the last save or restore: log the old value
+            self._magic = column.magic
+            if column.trail is not None:
+                column.trail.append((self._idx, self._values[self._idx]))
+        self._values[self._idx] = value
+        return value
+
+    def value(self):
+        return self._values[self._idx]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({repr(self.value())})"
+
+
+class CopyInt(Copy[int], StateInt):
+
+    __slots__ = ()
+
+
+class CopyColumn[T](Storage):
+    """
+    Values of all the state objects of one kind, stored side by side. Only
+    the values modified after a save are logged, with their old value, in
+    the trail of that save.
+    """
+
+    class ColumnStateEntry[T](StateEntry):
 
-    class CopyStateEntry[T](StateEntry):
+        __slots__ = ('_parent', '_trail', '_prev_trail')
 
-        def __init__(self, parent: "Copy") -> None:
+        def __init__(self, parent: "CopyColumn") -> None:
             self._parent = parent
-            self._v = parent._v
+            self._trail: list[tuple[int, T]] = []
+            self._reset()
+
+        def _reset(self) -> None:
+            # also used to rearm an entry taken from the pool of the column
+            parent = self._parent
+            self._prev_trail = parent.trail
+            parent.trail = self._trail
+            parent.magic += 1
 
         def restore(self) -> None:
-            self._parent._v = self._v
+            # in reverse order so that the oldest value of an entry logged
+            # twice wins
+            parent = self._parent
+            values = parent.values
+            for idx, v in reversed(self._trail):
+                values[idx] = v
+            self._trail.clear()
+            parent.trail = self._prev_trail
+            parent.magic += 1
+            parent.entry_pool.append(self)
 
         def __repr__(self) -> str:
-            return f"{self.__class__.__name__}({self._v})"
+            return f"{self.__class__.__name__}({self._trail})"
 
-    def __init__(self, init_value: T) -> None:
-        self._v = init_value
+    __slots__ = ('values', 'magic', 'trail', 'entry_pool')
 
-    def set_value(self, value: T) -> T:
-        self._v = value
-        return value
-
-    def value(self):
-        return self._v
+    def __init__(self, values: list[T]) -> None:
+        self.values = values
+        # changed on every save and restore
+        self.magic: int = 0
+        # old values logged since the last save, None before the first save
+        # since they will never be restored
+        self.trail: list[tuple[int, T]] | None = None
+        # restored entries, reused by the next saves
+        self.entry_pool: list[CopyColumn.ColumnStateEntry[T]] = []
 
     def save(self) -> StateEntry:
-        return self.CopyStateEntry(self)
+        if self.entry_pool:
+            entry = self.entry_pool.pop()
+            entry._reset()
+            return entry
+        return self.ColumnStateEntry(self)
 
     def __repr__(self) -> str:
-        return f"{self.__class__.__name__}({repr(self._v)})"
+        return f"{self.__class__.__name__}({list(self.values)})"
 
 
-class CopyInt(Copy[int], StateInt):
+class UndoStorage(Storage):
+    """
+    Undo operations ``fn(*args)`` registered by the owners of plain
+    attributes or buffers before each write, run in reverse order on restore
+    """
+
+    class UndoStateEntry(StateEntry):
 
-    def __init__(self, init_value: int) -> None:
-        super().__init__(init_value)
+        __slots__ = ('_parent', '_trail', '_prev_trail')
+
+        def __init__(self, parent: "UndoStorage") -> None:
+            self._parent = parent
+            self._trail: list[tuple[Callable[..., object], tuple]] = []
+            self._reset()
+
+        def _reset(self) -> None:
+            # also used to rearm an entry taken from the pool of the storage
+            self._prev_trail = self._parent.trail
+            self._parent.trail = self._trail
+
+        def restore(self) -> None:
+            for fn, args in reversed(self._trail):
+                fn(*args)
+            self._trail.clear()
+            self._parent.trail = self._prev_trail
+            self._parent.entry_pool.append(self)
+
+        def __repr__(self) -> str:
+            return f"{self.__class__.__name__}({[(fn.__name__, args) for fn, args in self._trail]})"
+
+    __slots__ = ('trail', 'entry_pool')
+
+    def __init__(self) -> None:
+        # undo operations registered since the last save, None before the
+        # first save
+        self.trail: list[tuple[Callable[..., object], tuple]] | None = None
+        # restored entries, reused by the next saves
+        self.entry_pool: list[UndoStorage.UndoStateEntry] = []
+
+    def save(self) -> StateEntry:
+        if self.entry_pool:
+            entry = self.entry_pool.pop()
+            entry._reset()
+            return entry
+        return self.UndoStateEntry(self)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}()"
 
 
 class NewState:
@@ -90,9 +205,9 @@ class CopyStateManager(StateManager):
     >>> y.set_value(20)
     20
     >>> sm.prior
-    Stack([Backup([CopyStateEntry(1)]), Backup([CopyStateEntry(2), CopyStateEntry(10)])])
+    Stack([Backup([ColumnStateEntry([(0, 1)]), ColumnStateEntry([]), UndoStateEntry([])]), Backup([ColumnStateEntry([(0, 2), (1, 10)]), ColumnStateEntry([]), UndoStateEntry([])])])
     >>> sm.store
-    Stack([CopyInt(3), CopyInt(20)])
+    Stack([CopyColumn([3, 20]), CopyColumn([]), UndoStorage()])
     >>> sm.restore_state()
     >>> x
     CopyInt(2)
@@ -124,20 +239,33 @@ class CopyStateManager(StateManager):
 
     class Backup(Stack[StateEntry]):
 
+        __slots__ = ('_store',)
+
         def __init__(self, store):
             super().__init__()
+            self._reset(store)
+
+        def _reset(self, store) -> None:
+            # also used to refill a backup taken from the pool
             self._store = store
-            self._sz = len(self._store)
-            for s in self._store:
-                self.push(s.save())
+            self._items[:] = [s.save() for s in store._items]
 
         def restore(self) -> None:
-            for state_entry in self:
+            for state_entry in self._items:
                 state_entry.restore()
+            # drop the entries and their trails before going to the pool
+            self._items.clear()
 
     def __init__(self) -> None:
-        self.store: Stack[Storage] = Stack[Storage]()
+        # state ints and the other state objects are stored in two
+        # separate columns
+        self._ints: CopyColumn[int] = CopyColumn([])
+        self._objs: CopyColumn[object] = CopyColumn([])
+        self._undo: UndoStorage = UndoStorage()
+        self.store: Stack[Storage] = Stack[Storage]([self._ints, self._objs, self._undo])
         self.prior: Stack[self.Backup] = Stack[self.Backup]()
+        # restored backups, reused by the next saves
+        self._backup_pool: list[CopyStateManager.Backup] = []
         # à voir si on veut une LinkedList ici ...
         self.on_restore_listeners: list[Procedure] = []
 
@@ -152,13 +280,20 @@ class CopyStateManager(StateManager):
         return len(self.prior) - 1
 
     def store_size(self) -> int:
-        return len(self.store)
+        return len(self._ints.values) + len(self._objs.values)
 
     def save_state(self) -> None:
-        self.prior.push(self.Backup(self.store))
+        if self._backup_pool:
+            backup = self._backup_pool.pop()
+            backup._reset(self.store)
+        else:
+            backup = self.Backup(self.store)
+        self.prior.push(backup)
 
     def restore_state(self) -> None:
-        self.prior.pop().restore()
+        backup = self.prior.pop()
+        backup.restore()
+        self._backup_pool.append(backup)
         self.notify_restore()
 
     def restore_state_until(self, level: int) -> None:
@@ -175,9 +310,48 @@ class CopyStateManager(StateManager):
         """
         Creates an Integer that can be restored in place on `restore_state()`
         """
-        s: CopyInt = CopyInt(init_value)
-        self.store.push(s)
-        return s
+        self._ints.values.append(init_value)
+        return CopyInt(self._ints, len(self._ints.values) - 1)
+
+    def save_attr(self, obj: object, name: str) -> None:
+        """
+        Logs the value of the attribute ``name`` of ``obj`` so that it is
+        restored on `restore_state()`. Must be called before each write.
+
+        >>> class Counter: pass
+        >>> sm = CopyStateManager()
+        >>> c = Counter()
+        >>> c.n = 1
+        >>> sm.save_state()
+        >>> sm.save_attr(c, 'n')
+        >>> c.n = 2
+        >>> sm.save_attr(c, 'n')
+        >>> c.n = 3
+        >>> sm.restore_state()
+        >>> c.n
+        1
+        """
+        trail = self._undo.trail
+        if trail is not None:
+            trail.append((setattr, (obj, name, getattr(obj, name))))
+
+    def register_undo(self, fn: Callable[..., object], *args) -> None:
+        """
+        Registers ``fn(*args)`` to be called on `restore_state()`, to undo a
+        write made after the last save.
+
+        >>> sm = CopyStateManager()
+        >>> bits = bytearray(2)
+        >>> sm.save_state()
+        >>> sm.register_undo(bits.__setitem__, 1, bits[1])
+        >>> bits[1] = 1
+        >>> sm.restore_state()
+        >>> bits
+        bytearray(b'\\x00\\x00')
+        """
+        trail = self._undo.trail
+        if trail is not None:
+            trail.append((fn, args))
 
     def make_state_obj[T](self, obj: T) -> State[T]:
         """
@@ -204,9 +378,8 @@ class CopyStateManager(StateManager):
         >>> obj
         Copy([1, 2, 3])
         """
-        r: Copy = Copy(init_value=obj)
-        self.store.push(r)
-        return r
+        self._objs.values.append(obj)
+        return Copy(self._objs, len(self._objs.values) - 1)
 
 
 if __name__ == "__main__":
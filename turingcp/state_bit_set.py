@@ -0,0 +1,305 @@
+from collections.abc import Iterable, MutableSequence
+
+from state_types import StateManager
+
+from state import CopyStateManager
+from state_sparse_set import NoSuchElementException
+from cp_types import CHANGE, CHANGE_MIN, CHANGE_MAX, FIX, EMPTY
+
+
+# largest range of values for which a StateBitSet should be used instead of a
+# StateSparseSet, so that its bits fit in a machine word
+MAX_BIT_SET_RANGE = 64
+
+
+class StateBitSet:
+    """
+    Set of integers with the same interface as ``StateSparseSet``, for small
+    ranges of values: the whole set is a single int whose bit ``v`` is set
+    while ``v + offset`` is in the set.
+
+    >>> sm = CopyStateManager()
+    >>> s = StateBitSet(sm, range(4, 8))
+    >>> bin(s._bits)
+    '0b1111'
+    >>> s
+    StateBitSet([4, 5, 6, 7])
+    >>> len(s)
+    4
+    >>> s.to_list()
+    [4, 5, 6, 7]
+    >>> s.min()
+    4
+    >>> s.max()
+    7
+
+    >>> s = StateBitSet(sm, [2, 4, 6])
+    >>> bin(s._bits)
+    '0b10101'
+    >>> len(s)
+    3
+    >>> 4 in s, 5 in s, 1 in s, 70 in s
+    (True, False, False, False)
+    >>> s = StateBitSet(sm, [])
+    Traceback (most recent call last):
+        ...
+    ValueError: Set cannot be initialized with empty iterable
+    >>> s = StateBitSet(sm, [1])
+    >>> s.remove(1)
+    True
+    >>> 1 in s
+    False
+    >>> s.min()
+    Traceback (most recent call last):
+        ...
+    state_sparse_set.NoSuchElementException: Unable to find min of empty set
+
+    >>> sm = CopyStateManager()
+    >>> s = StateBitSet(sm, range(5))
+    >>> sm.save_state()
+    >>> s.remove_above(2)
+    3
+    >>> s.remove(0)
+    True
+    >>> s
+    StateBitSet([1, 2])
+    >>> sm.restore_state()
+    >>> s
+    StateBitSet([0, 1, 2, 3, 4])
+    """
+
+    __slots__ = ('_sm', '_bits', '_offset')
+
+    def __init__(self, sm: StateManager, values: Iterable[int]) -> None:
+        values = set(values)
+        if not values:
+            raise ValueError("Set cannot be initialized with empty iterable")
+
+        self._sm: StateManager = sm
+        self._offset: int = min(values)
+        # plain int, saved in the state manager before each change
+        self._bits: int = 0
+        for v in values:
+            self._bits |= 1 << (v - self._offset)
+
+    def min(self) -> int:
+        bits = self._bits
+        if not bits:
+            raise NoSuchElementException("Unable to find min of empty set")
+        return (bits & -bits).bit_length() - 1 + self._offset
+
+    def max(self) -> int:
+        bits = self._bits
+        if not bits:
+            raise NoSuchElementException("Unable to find max of empty set")
+        return bits.bit_length() - 1 + self._offset
+
+    def __len__(self) -> int:
+        return self._bits.bit_count()
+
+    def is_empty(self) -> bool:
+        return self._bits == 0
+
+    def remove(self, value: int) -> bool:
+        """
+        Removes `value` from set if possible.
+        Returns `True` if it has been removed and `False` otherwise.
+
+        >>> sm = CopyStateManager()
+        >>> s = StateBitSet(sm, [1, 2, 3, 4])
+        >>> s.remove(0)
+        False
+        >>> s.remove(2)
+        True
+        >>> s.remove(2)
+        False
+        >>> s
+        StateBitSet([1, 3, 4])
+        """
+        return self.remove_flags(value) != 0
+
+    def remove_flags(self, value: int) -> int:
+        """
+        Removes `value` from set if possible. Returns the changes of the set
+        as domain change flags (see ``cp_types``), 0 if `value` was not in
+        the set.
+
+        >>> sm = CopyStateManager()
+        >>> s = StateBitSet(sm, [1, 2, 3])
+        >>> s.remove_flags(4)
+        0
+        >>> s.remove_flags(-4)
+        0
+        >>> s.remove_flags(2) == CHANGE
+        True
+        >>> s.remove_flags(1) == CHANGE | CHANGE_MIN | FIX
+        True
+        >>> s.remove_flags(3) == CHANGE | CHANGE_MIN | CHANGE_MAX | EMPTY
+        True
+        """
+        v: int = value - self._offset
+        bits: int = self._bits
+        if v < 0 or not bits >> v & 1:
+            return 0
+        self._sm.save_attr(self, '_bits')
+        removed: int = 1 << v
+        bits ^= removed
+        self._bits = bits
+
+        if not bits:
+            # v was both the min and the max
+            return CHANGE | CHANGE_MIN | CHANGE_MAX | EMPTY
+
+        flags: int = CHANGE if bits & (bits - 1) else CHANGE | FIX
+        if removed < bits & -bits:
+            flags |= CHANGE_MIN
+        elif removed > bits:
+            flags |= CHANGE_MAX
+        return flags
+
+    def remove_all_but(self, value: int) -> None:
+        """
+        >>> sm = CopyStateManager()
+        >>> s = StateBitSet(sm, [1, 2, 3, 4, 5])
+        >>> s.remove_all_but(3)
+        >>> s
+        StateBitSet([3])
+        >>> s.remove(3)
+        True
+        >>> s.remove_all_but(3)
+        Traceback (most recent call last):
+            ...
+        state_sparse_set.NoSuchElementException: Value is not in set
+        """
+        if value not in self:
+            raise NoSuchElementException("Value is not in set")
+        bits: int = 1 << (value - self._offset)
+        if self._bits != bits:
+            self._sm.save_attr(self, '_bits')
+            self._bits = bits
+
+    def remove_all(self) -> None:
+        """
+        >>> sm = CopyStateManager()
+        >>> s = StateBitSet(sm, [2, 3, 4])
+        >>> s.remove_all()
+        >>> s
+        StateBitSet([])
+        """
+        if self._bits:
+            self._sm.save_attr(self, '_bits')
+            self._bits = 0
+
+    def remove_above(self, value: int) -> int:
+        """
+        Removes the values above `value` and returns the new size of the set.
+
+        >>> sm = CopyStateManager()
+        >>> s = StateBitSet(sm, [1, 3, 5, 6, 7])
+        >>> s.remove_above(5)
+        3
+        >>> s
+        StateBitSet([1, 3, 5])
+        >>> sm.save_state()
+        >>> s.remove_above(5), s.remove_above(10)
+        (3, 3)
+        >>> sm._undo.trail
+        []
+        >>> s.remove_above(0)
+        0
+        >>> s
+        StateBitSet([])
+        """
+        stop: int = value - self._offset
+        if stop < 0:
+            self.remove_all()
+            return 0
+        if self._bits >> (stop + 1):
+            self._sm.save_attr(self, '_bits')
+            self._bits &= (2 << stop) - 1
+        return self._bits.bit_count()
+
+    def remove_below(self, value: int) -> int:
+        """
+        Removes the values below `value` and returns the new size of the set.
+
+        >>> sm = CopyStateManager()
+        >>> s = StateBitSet(sm, [1, 3, 5, 6, 7])
+        >>> s.remove_below(4)
+        3
+        >>> s
+        StateBitSet([5, 6, 7])
+        >>> sm.save_state()
+        >>> s.remove_below(0), s.remove_below(4), s.remove_below(5)
+        (3, 3, 3)
+        >>> sm._undo.trail
+        []
+        >>> s.remove_below(10)
+        0
+        >>> s
+        StateBitSet([])
+        """
+        stop: int = value - self._offset
+        if stop > 0 and self._bits & ((1 << stop) - 1):
+            self._sm.save_attr(self, '_bits')
+            self._bits &= -(1 << stop)
+        return self._bits.bit_count()
+
+    def __contains__(self, value: int) -> bool:
+        v: int = value - self._offset
+        return v >= 0 and self._bits >> v & 1 == 1
+
+    def to_list(self) -> list[int]:
+        """
+        >>> sm = CopyStateManager()
+        >>> s = StateBitSet(sm, [3, 1, 2])
+        >>> s.to_list()
+        [1, 2, 3]
+        """
+        bits, offset = self._bits, self._offset
+        return [v + offset for v in range(bits.bit_length()) if bits >> v & 1]
+
+    def fill_list(self, dest: MutableSequence[int]) -> int:
+        """
+        Copies the values of the set, in increasing order, at the start of
+        ``dest`` and returns their number
+
+        >>> sm = CopyStateManager()
+        >>> s = StateBitSet(sm, [1, 2, 3])
+        >>> dest = [0] * 4
+        >>> s.fill_list(dest), dest
+        (3, [1, 2, 3, 0])
+        >>> from array import array
+        >>> dest = array('q', bytes(8 * 4))
+        >>> s.fill_list(dest), dest.tolist()
+        (3, [1, 2, 3, 0])
+        """
+        bits, offset = self._bits, self._offset
+        # written by index, so that ``dest`` can also be an array
+        i = 0
+        for v in range(bits.bit_length()):
+            if bits >> v & 1:
+                dest[i] = v + offset
+                i += 1
+        return i
+
+    def to_set(self) -> set[int]:
+        return set(self.to_list())
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_list()})"
+
+    def __str__(self) -> str:
+        """
+        >>> sm = CopyStateManager()
+        >>> s = StateBitSet(sm, [1, 2, 3])
+        >>> str(s)
+        '{1, 2, 3}'
+        """
+        return "{" + ", ".join(str(x) for x in self.to_list()) + "}"
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod()
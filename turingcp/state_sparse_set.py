@@ -1,8 +1,9 @@
-from collections.abc import Iterable
+from collections.abc import Iterable, MutableSequence
 
-from state_types import StateManager, StateInt
+from state_types import StateManager
 
 from state import CopyStateManager
+from cp_types import CHANGE, CHANGE_MIN, CHANGE_MAX, FIX, EMPTY
 
 
 class NoSuchElementException(Exception):
@@ -25,9 +26,9 @@ class StateSparseSet:
     [4, 5, 6, 7]
     >>> s.to_set() == {4, 5, 6, 7}
     True
-    >>> s._min.value()
+    >>> s._min
     0
-    >>> s._max.value()
+    >>> s._max
     3
     >>> s.min()
     4
@@ -39,7 +40,9 @@ class StateSparseSet:
     >>> s
     StateSparseSet([2, 4, 6])
     >>> s._values
-    [0, 4, 2, 3, 1]
+    [0, 2, 4, 1, 3]
+    >>> s._indices
+    [0, 3, 1, 4, 2]
     >>> len(s)
     3
     >>> sm = CopyStateManager()
@@ -66,45 +69,52 @@ class StateSparseSet:
     >>> s = StateSparseSet(sm, {3, 5, 7})
     >>> len(s)
     3
-    >>> s._min.value()
+    >>> s._min
     0
     >>> s.min()
     3
     """
 
+    __slots__ = ('_sm', '_size', '_min', '_max', '_offset', '_values', '_indices')
+
     def __init__(self, sm: StateManager, values: Iterable[int]) -> None:
-        if len(values) > 0:
-            a = min(values)
-            b = max(values)
-        else:
+        present = sorted(set(values))
+        if not present:
             raise ValueError("Set cannot be initialized with empty iterable")
 
-        self._size: StateInt = sm.make_state_int(b - a + 1)
-        self._min: StateInt = sm.make_state_int(0)
-        self._max: StateInt = sm.make_state_int(b - a)
+        a = present[0]
+        span = present[-1] - a + 1
 
-        self._offset: int = a
-        self._values: list[int] = list(range(0, b + 1 - a))
-        self._indices: list[int] = self._values[:]
+        # size, min and max are plain ints, saved together in the state
+        # manager by _save_bounds before each change
+        self._sm: StateManager = sm
+        self._size: int = len(present)
+        self._min: int = 0
+        self._max: int = span - 1
 
-        # remove all the values that are not present in values
+        self._offset: int = a
+        # present values first, then the missing ones of the range
+        present_mask = bytearray(span)
+        self._values: list[int] = [v - a for v in present]
         for intern_value in self._values:
-            val = intern_value + self._offset
-            if val not in values:
-                self.remove(val)
+            present_mask[intern_value] = 1
+        self._values.extend(x for x in range(span) if not present_mask[x])
+        self._indices: list[int] = [0] * span
+        for i, intern_value in enumerate(self._values):
+            self._indices[intern_value] = i
 
     def min(self) -> int:
         if self.is_empty():
             raise NoSuchElementException("Unable to find min of empty set")
-        return self._min.value() + self._offset
+        return self._min + self._offset
 
     def max(self) -> int:
         if self.is_empty():
             raise NoSuchElementException("Unable to find max of empty set")
-        return self._max.value() + self._offset
+        return self._max + self._offset
 
     def __len__(self) -> int:
-        return self._size.value()
+        return self._size
 
     def is_empty(self) -> bool:
         return len(self) == 0
@@ -159,24 +169,69 @@ class StateSparseSet:
         StateSparseSet([3])
 
         """
-        if value not in self:
-            return False
-
-        intern_value = value - self._offset
-        s = len(self)
-        self._swap_positions(intern_value, self._values[s - 1])
-        self._size.decrement()
-        self._update_min(intern_value)
-        self._update_max(intern_value)
-        return True
-
-    def _swap_positions(self, v1: int, v2: int) -> None:
-        i1: int = self._indices[v1]
-        i2: int = self._indices[v2]
-        self._values[i1] = v2
-        self._values[i2] = v1
-        self._indices[v1] = i2
-        self._indices[v2] = i1
+        return self.remove_flags(value) != 0
+
+    def remove_flags(self, value: int) -> int:
+        """
+        Removes `value` from set if possible in O(1) time. Returns the
+        changes of the set as domain change flags (see ``cp_types``), 0 if
+        `value` was not in the set.
+
+        >>> sm = CopyStateManager()
+        >>> s = StateSparseSet(sm, [1, 2, 3])
+        >>> s.remove_flags(4)
+        0
+        >>> s.remove_flags(2) == CHANGE
+        True
+        >>> s.remove_flags(1) == CHANGE | CHANGE_MIN | FIX
+        True
+        >>> s.remove_flags(3) == CHANGE | CHANGE_MIN | CHANGE_MAX | EMPTY
+        True
+        """
+        # the values out of [min, max] are placed after the size too, so a
+        # value that is not in the set (the most frequent case during
+        # propagation) is detected with the size only
+        v: int = value - self._offset
+        values, indices = self._values, self._indices
+        if v < 0 or v >= len(indices):
+            return 0
+        i: int = indices[v]
+        size: int = self._size
+        if i >= size:
+            return 0
+        min_v: int = self._min
+        max_v: int = self._max
+        self._sm.register_undo(self._restore_bounds, size, min_v, max_v)
+
+        # swap v with the last value of the set
+        size -= 1
+        last: int = values[size]
+        values[i] = last
+        values[size] = v
+        indices[last] = i
+        indices[v] = size
+        self._size = size
+
+        if size == 0:
+            # v was both the min and the max
+            return CHANGE | CHANGE_MIN | CHANGE_MAX | EMPTY
+
+        flags: int = CHANGE if size > 1 else CHANGE | FIX
+        # the set is not empty: the new bound is reached before the other
+        # bound
+        if v == min_v:
+            v += 1
+            while indices[v] >= size:
+                v += 1
+            self._min = v
+            flags |= CHANGE_MIN
+        elif v == max_v:
+            v -= 1
+            while indices[v] >= size:
+                v -= 1
+            self._max = v
+            flags |= CHANGE_MAX
+        return flags
 
     def remove_all_but(self, value: int) -> None:
         """
@@ -189,6 +244,10 @@ class StateSparseSet:
         3
         >>> s.max()
         3
+        >>> sm.save_state()
+        >>> s.remove_all_but(3)
+        >>> sm._undo.trail
+        []
         >>> s.remove(3)
         True
         >>> s.remove_all_but(3)
@@ -198,14 +257,22 @@ class StateSparseSet:
         """
         if value not in self:
             raise NoSuchElementException("Value is not in set")
+        if self._size == 1:
+            # value is already the only value of the set
+            return
         _v: int = value - self._offset
-        index: int = self._indices[_v]
-        self._indices[_v] = 0
-        self._indices[self._values[0]] = index
-        self._values[index], self._values[0] = self._values[0], self._values[index]
-        self._size.set_value(1)
-        self._min.set_value(_v)
-        self._max.set_value(_v)
+        self._save_bounds()
+        values, indices = self._values, self._indices
+        # swap _v with the first value of the set
+        index: int = indices[_v]
+        first: int = values[0]
+        values[index] = first
+        values[0] = _v
+        indices[first] = index
+        indices[_v] = 0
+        self._size = 1
+        self._min = _v
+        self._max = _v
 
     def remove_all(self) -> None:
         """
@@ -217,71 +284,132 @@ class StateSparseSet:
         >>> s
         StateSparseSet([])
         """
-        self._size.set_value(0)
+        if self._size == 0:
+            return
+        self._save_bounds()
+        self._size = 0
 
-    def remove_above(self, value: int) -> None:
+    def remove_above(self, value: int) -> int:
         """
+        Removes the values above `value` and returns the new size of the set.
+
         >>> sm = CopyStateManager()
         >>> s = StateSparseSet(sm, [3, 4, 5, 6, 7])
         >>> s.remove_above(5)
+        3
         >>> s
         StateSparseSet([3, 4, 5])
 
         >>> sm = CopyStateManager()
         >>> s = StateSparseSet(sm, [1, 3, 5, 6, 7])
         >>> s.remove_above(5)
+        3
         >>> s
         StateSparseSet([1, 3, 5])
+        >>> s.max()
+        5
+        >>> s.remove_above(5), s.remove_above(10)
+        (3, 3)
+        >>> s, s.max()
+        (StateSparseSet([1, 3, 5]), 5)
         >>> s.remove_above(0)
+        0
         >>> s
         StateSparseSet([])
         """
         if value < self.min():
             self.remove_all()
-        else:
-            v = self.max()
-            while v > value:
-                self.remove(v)
-                v -= 1
-
-    def remove_below(self, value: int) -> None:
+            return 0
+
+        stop: int = value - self._offset
+        size: int = self._size
+        if stop >= self._max:
+            return size
+        self._save_bounds()
+        values, indices = self._values, self._indices
+        # same swaps as removing the values one by one from the max down
+        for v in range(self._max, stop, -1):
+            i: int = indices[v]
+            if i < size:
+                size -= 1
+                last: int = values[size]
+                values[i] = last
+                values[size] = v
+                indices[last] = i
+                indices[v] = size
+        self._size = size
+
+        # the min is still in the set, so the new max is found before it
+        v = stop
+        while indices[v] >= size:
+            v -= 1
+        self._max = v
+        return size
+
+    def remove_below(self, value: int) -> int:
         """
+        Removes the values below `value` and returns the new size of the set.
+
         >>> sm = CopyStateManager()
         >>> s = StateSparseSet(sm, [3, 4, 5, 6, 7])
         >>> s.remove_below(5)
+        3
         >>> s
         StateSparseSet([5, 6, 7])
 
         >>> sm = CopyStateManager()
         >>> s = StateSparseSet(sm, [1, 3, 5, 6, 7])
-        >>> s.remove_below(5)
+        >>> s.remove_below(4)
+        3
         >>> s
         StateSparseSet([5, 6, 7])
+        >>> s.min()
+        5
+        >>> s.remove_below(5), s.remove_below(0), s.remove_below(-5)
+        (3, 3, 3)
+        >>> s, s.min()
+        (StateSparseSet([5, 6, 7]), 5)
         >>> s.remove_below(10)
+        0
         >>> s
         StateSparseSet([])
         """
         if value > self.max():
             self.remove_all()
-        else:
-            v = self.min()
-            while v < value:
-                self.remove(v)
-                v += 1
-
-    def _update_min(self, intern_value: int) -> None:
-        if not self.is_empty() and intern_value == self._min.value():
-            val = self._min.value() + 1
-            while not self._raw_contains(val):
-                val += 1
-            self._min.set_value(val)
-
-    def _update_max(self, intern_value: int) -> None:
-        if not self.is_empty() and intern_value == self._max.value():
-            val = self._max.value() - 1
-            while not self._raw_contains(val):
-                val -= 1
-            self._max.set_value(val)
+            return 0
+
+        stop: int = value - self._offset
+        size: int = self._size
+        if stop <= self._min:
+            return size
+        self._save_bounds()
+        values, indices = self._values, self._indices
+        # same swaps as removing the values one by one from the min up
+        for v in range(self._min, stop):
+            i: int = indices[v]
+            if i < size:
+                size -= 1
+                last: int = values[size]
+                values[i] = last
+                values[size] = v
+                indices[last] = i
+                indices[v] = size
+        self._size = size
+
+        # the max is still in the set, so the new min is found before it
+        v = stop
+        while indices[v] >= size:
+            v += 1
+        self._min = v
+        return size
+
+    def _save_bounds(self) -> None:
+        self._sm.register_undo(self._restore_bounds, self._size, self._min, self._max)
+
+    def _restore_bounds(self, size: int, min_v: int, max_v: int) -> None:
+        self._size = size
+        self._min = min_v
+        self._max = max_v
 
     def _raw_contains(self, value: int) -> bool:
         """
@@ -291,7 +419,7 @@ class StateSparseSet:
         [0]
         >>> len(s)
         1
-        >>> s._min.value()
+        >>> s._min
         0
         >>> s._raw_contains(-1)
         False
@@ -299,21 +427,20 @@ class StateSparseSet:
         False
         >>> s._raw_contains(0)
         True
-        >>> s._size.set_value(0)
-        0
+        >>> s._size = 0
         >>> s._raw_contains(0)
         False
         """
-        if value < self._min.value() or value > self._max.value():
-            return False
-        else:
-            return self._indices[value] < len(self)
+        # the values out of [min, max] are placed after the size, so the
+        # size alone tells if a value of the range is in the set
+        return 0 <= value < len(self._indices) and self._indices[value] < self._size
 
     def _index_of(self, value: int) -> int:
         return self._indices[value]
 
     def __contains__(self, value: int) -> bool:
-        return self._raw_contains(value - self._offset)
+        v: int = value - self._offset
+        return 0 <= v < len(self._indices) and self._indices[v] < self._size
 
     def to_list(self) -> list[int]:
         """
@@ -322,7 +449,31 @@ class StateSparseSet:
         >>> s.to_list()
         [1, 2, 3]
         """
-        return sorted([x + self._offset for x in self._values[: len(self)]])
+        offset = self._offset
+        return sorted([x + offset for x in self._values[: self._size]])
+
+    def fill_list(self, dest: MutableSequence[int]) -> int:
+        """
+        Copies the values of the set, in storage order, at the start of
+        ``dest`` and returns their number
+
+        >>> sm = CopyStateManager()
+        >>> s = StateSparseSet(sm, [1, 2, 3])
+        >>> s.remove(1)
+        True
+        >>> dest = [0] * 3
+        >>> s.fill_list(dest), dest
+        (2, [3, 2, 0])
+        >>> from array import array
+        >>> dest = array('q', bytes(8 * 3))
+        >>> s.fill_list(dest), dest.tolist()
+        (2, [3, 2, 0])
+        """
+        size, offset, values = self._size, self._offset, self._values
+        # written by index, so that ``dest`` can also be an array
+        for i in range(size):
+            dest[i] = values[i] + offset
+        return size
 
     def to_set(self) -> set[int]:
         """
@@ -331,7 +482,8 @@ class StateSparseSet:
         >>> s.to_set() == {2, 4, 6}
         True
         """
-        return set(self.to_list())
+        offset = self._offset
+        return {x + offset for x in self._values[: self._size]}
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.to_list()})"
@@ -358,7 +510,7 @@ def intern_tests():
     [0, 1, 2, 3, 4, 5, 6, 7]
 
     [0, 4, 2, 3, 1]
-    >>> s._size.value()
+    >>> s._size
     8
     >>> s.remove(4)
     True
@@ -373,16 +525,17 @@ def intern_tests():
     [0, 1, 2, 3, 6, 5, 7, 4]
     >>> s._indices
     [0, 1, 2, 3, 7, 5, 4, 6]
-    >>> s._max.value()
+    >>> s._max
     6
     >>> s.remove_below(2)
+    4
     >>> s._values
     [5, 6, 2, 3, 1, 0, 7, 4]
     >>> s._indices
     [5, 4, 2, 3, 7, 0, 1, 6]
-    >>> s._size.value()
+    >>> s._size
     4
-    >>> s._min.value()
+    >>> s._min
     2
     >>> s.remove_all_but(6)
     >>> s._values
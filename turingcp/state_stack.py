@@ -1,8 +1,8 @@
 from typing import Generic, TypeVar
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator
 
 from stack import StackADT, StackException, EmptyStackError
-from state_types import StateManager, StateInt
+from state_types import StateManager
 from state import CopyStateManager
 
 T = TypeVar('T')
@@ -55,41 +55,80 @@ class StateStack(StackADT[T], Generic[T]):
 
     '''
 
+    __slots__ = ('_items', '_sm', '_real_size')
+
     def __init__(self, sm: StateManager, items: Iterable[T] | None = None) -> None:
         self._items: list[T] = list(items) if items is not None else []
-        self._iter_position = 0
+        self._sm: StateManager = sm
 
-        # initially _item size is the real size
-        self._real_size: StateInt = sm.make_state_int(len(self._items))
+        # initially _item size is the real size. It is a plain int, logged
+        # by the state manager before each write
+        self._real_size: int = len(self._items)
 
     def __repr__(self) -> str:
-        return f'{self.__class__.__name__}({self._items[:self._real_size.value()]})'
+        return f'{self.__class__.__name__}({self._items[:self._real_size]})'
 
     def __len__(self) -> int:
-        return self._real_size.value()
+        return self._real_size
 
     def push(self, item: T) -> None:
-        if self._real_size.value() < len(self._items):
-            self._items[self._real_size.value()] = item
+        size: int = self._real_size
+        self._sm.save_attr(self, '_real_size')
+        if size < len(self._items):
+            self._items[size] = item
         else:
             self._items.append(item)
-        self._real_size.increment()
+        self._real_size = size + 1
 
     def pop(self) -> T:
-        if self._real_size.value() == 0:
+        size: int = self._real_size
+        if size == 0:
             raise EmptyStackError('Pop from an empty stack')
 
-        item = self._items[self._real_size.value() - 1]
-        self._real_size.decrement()
-        return item
+        self._sm.save_attr(self, '_real_size')
+        self._real_size = size - 1
+        return self._items[size - 1]
 
     def peek(self) -> T:
-        if self._real_size.value() == 0:
+        if self._real_size == 0:
             raise EmptyStackError('Peek an empty stack')
-        return self._items[self._real_size.value() - 1]
+        return self._items[self._real_size - 1]
 
     def is_empty(self) -> bool:
-        return len(self) == 0
+        return self._real_size == 0
+
+    def __getitem__(self, index: int) -> T:
+        '''
+        >>> sm = CopyStateManager()
+        >>> s = StateStack(sm, [4, 6, 8])
+        >>> s[1]
+        6
+        >>> s.pop()
+        8
+        >>> s[2]
+        Traceback (most recent call last):
+          ...
+        IndexError: StateStack index out of range
+        '''
+        if not 0 <= index < self._real_size:
+            raise IndexError('StateStack index out of range')
+        return self._items[index]
+
+    def snapshot(self) -> tuple[list[T], int]:
+        '''
+        Returns the backing list and the current size, for tight loops that
+        index the items directly. The list is only modified in place, but
+        its items beyond the size are stale.
+
+        >>> sm = CopyStateManager()
+        >>> s = StateStack(sm, [4, 6, 8])
+        >>> s.pop()
+        8
+        >>> items, n = s.snapshot()
+        >>> [items[i] for i in range(n)]
+        [4, 6]
+        '''
+        return self._items, self._real_size
 
     def resize(self, new_size: int) -> None:
         '''
@@ -110,23 +149,24 @@ class StateStack(StackADT[T], Generic[T]):
         
         '''
         if new_size <= len(self._items):
-            self._real_size.set_value(new_size)
+            self._sm.save_attr(self, '_real_size')
+            self._real_size = new_size
             return 
         else:
             raise StackException("Cannot resize above underlying collection size")
             
     
-    def __iter__(self):
-        self._iter_position = 0
-        return self
-    
-    def __next__(self):
-        if self._iter_position < self._real_size.value():
-            item: T = self._items[self._iter_position]
-            self._iter_position += 1
-            return item
+    def __iter__(self) -> Iterator[T]:
+        '''
+        Iterates over a copy of the items, so that nested iterations and
+        modifications of the stack during the iteration are safe
 
-        raise StopIteration
+        >>> sm = CopyStateManager()
+        >>> s = StateStack(sm, [1, 2])
+        >>> [(a, b) for a in s for b in s]
+        [(1, 1), (1, 2), (2, 1), (2, 2)]
+        '''
+        return iter(self._items[:self._real_size])
     
     
 def test_restore():
@@ -1,3 +1,4 @@
+from collections.abc import Callable
 from typing import Protocol
 
 from util_types import Procedure
@@ -5,6 +6,8 @@ from util_types import Procedure
 
 class State[T](Protocol):
 
+    __slots__ = ()
+
     def set_value(self, v: T) -> T: ...
 
     def value(self) -> T: ...
@@ -14,16 +17,22 @@ class State[T](Protocol):
 
 class StateEntry(Protocol):
 
+    __slots__ = ()
+
     def restore(self) -> None: ...
 
 
 class Storage(Protocol):
 
+    __slots__ = ()
+
     def save(self) -> StateEntry: ...
     
 
 class StateInt(State[int]):
 
+    __slots__ = ()
+
     def increment(self) -> int:
         return self.set_value(self.value() + 1)
 
@@ -80,6 +89,20 @@ class StateManager(Protocol):
         """
         ...
 
+    def save_attr(self, obj: object, name: str) -> None:
+        """
+        Logs the value of the attribute `name` of `obj` so that it is restored
+        in place on `restore_state()`. Must be called before each write.
+        """
+        ...
+
+    def register_undo(self, fn: Callable[..., object], *args) -> None:
+        """
+        Registers `fn(*args)` to be called on `restore_state()`, to undo a
+        write made after the last save.
+        """
+        ...
+
     def make_state_obj[T](self, obj: T) -> State[T]:
         """
         Creates an object of type `T` that can be restored in place on
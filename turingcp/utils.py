@@ -1,4 +1,17 @@
+from typing import NoReturn
+
+
 class InconsistencyException(Exception): ...
 
 
+# raised on every failure of the search, so it is only created once
+INCONSISTENCY = InconsistencyException()
+
+
+def raise_inconsistency() -> NoReturn:
+    # the traceback of the previous failure is dropped: it would otherwise
+    # be extended by each raise and keep the frames of the failure alive
+    raise INCONSISTENCY.with_traceback(None)
+
+
 class StopSearchException(Exception): ...
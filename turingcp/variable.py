@@ -1,4 +1,4 @@
-from collections.abc import Iterable
+from collections.abc import Iterable, MutableSequence
 
 from util_types import Procedure
 from cp_types import IntDomain, DomainListener, CPSolver, IntVar, BoolVar, Constraint
@@ -9,7 +9,7 @@ from state_stack import StateStack
 from state import CopyStateManager
 
 from solver import TuringCP
-from utils import InconsistencyException
+from utils import raise_inconsistency
 from constraint import FuncConstraint
 
 
@@ -51,7 +51,10 @@ class IntVarImpl(IntVar):
     IntVar(domain=SparseSetDomain([]), name='Var_0')
     """
 
-    var_counter: int = 0
+    __slots__ = (
+        'solver', 'domain', '_name', '_idx',
+        '_on_domain', '_on_fix', '_on_bound', '_domain_listener',
+    )
 
     def __init__(
         self, solver: CPSolver, values: Iterable[int], name: str | None = None
@@ -60,13 +63,13 @@ class IntVarImpl(IntVar):
 
         self.solver: CPSolver = solver
         self.domain: IntDomain = SparseSetDomain(sm, values)
-        self.name = name or f"Var_{IntVarImpl.var_counter}"
-        
+        self._name: str | None = name
+
+        # position in the solver variable stack, used for the default name
+        self._idx: int = len(self.solver.vars)
         # add the variable to the solver variable stack
         self.solver.add_variable(self)
 
-        IntVarImpl.var_counter += 1
-
         # the variable maintains stacks of constraints that have
         # to be propagated when different type of changes happen
         # on the domain
@@ -82,11 +85,20 @@ class IntVarImpl(IntVar):
             fix=self.handle_fix,
         )
 
+    @property
+    def name(self) -> str:
+        # the default name is only built when someone asks for it
+        return self._name or f"Var_{self._idx}"
+
+    @name.setter
+    def name(self, name: str | None) -> None:
+        self._name = name
+
     def get_solver(self) -> CPSolver:
         return self.solver
 
     def handle_empty(self):
-        raise InconsistencyException
+        raise_inconsistency()
 
     def handle_change(self):
         self._schedule_all(self._on_domain)
@@ -101,8 +113,13 @@ class IntVarImpl(IntVar):
         self._schedule_all(self._on_fix)
 
     def _schedule_all(self, constraints: StateStack[Constraint]) -> None:
-        for c in constraints:
-            self.solver.schedule(c)
+        # scheduling does not modify the stack, so its items are read in
+        # place instead of through a copy
+        items, size = constraints.snapshot()
+        if size:
+            schedule = self.solver.schedule
+            for i in range(size):
+                schedule(items[i])
 
     def when_fixed(self, f: Procedure) -> None:
         self._on_fix.push(self._func_constraint(f))
@@ -151,10 +168,8 @@ class IntVarImpl(IntVar):
     def remove_above(self, v: int) -> None:
         self.domain.remove_above(v, self._domain_listener)
         
-    def fill_list(self, dest: list[int]) -> int:
-        for i in range(len(self.domain)):
-            dest[i] = self.domain[i]
-        return len(self.domain)
+    def fill_list(self, dest: MutableSequence[int]) -> int:
+        return self.domain.fill_list(dest)
     
     def __contains__(self, v: int) -> bool:
         return v in self.domain
@@ -168,6 +183,8 @@ class BoolVarImpl(BoolVar):
     TODO: implement the remaining methods + add docstring
     """
 
+    __slots__ = ('_bin_var',)
+
     def __init__(
         self,
         solver: CPSolver | None = None,